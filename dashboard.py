@@ -13,8 +13,61 @@ from utils.data_utils import (
     load_top_overruns,
     categorize_ncr_hours
 )
-from utils.visualization import create_yearly_trends_chart, create_customer_profit_chart, create_workcenter_chart, create_workcenter_roi_chart, create_simplified_customer_chart
+from utils.visualization import create_yearly_trends_chart, create_customer_profit_chart, create_workcenter_chart, create_workcenter_roi_chart, create_simplified_customer_chart, create_empty_chart
 import re
+import os
+
+# Pulls the year out of markdown year links such as "[2023](/Yearly_Analysis?year=2023)"
+YEAR_LINK_PATTERN = re.compile(r'\[(.*?)\]')
+
+# HTML for one summary metric card; rows of cards are laid out with flexbox
+METRIC_CARD_TEMPLATE = """<div class="metric-card" style="flex: 1;">
+    <div class="metric-label">{label}</div>
+    <div class="metric-value">{value}</div>
+    <div style="position: absolute; top: 0; right: 0; width: 30px; height: 30px; background-color: {color}; 
+              color: white; display: flex; align-items: center; justify-content: center; border-radius: 0 8px 0 8px;">
+        <span style="font-size: 18px;">ℹ️</span>
+    </div>
+</div>"""
+
+# Static styling shared by the customer and efficiency charts
+CUSTOMER_CHART_LABELS = {
+    'planned_hours': 'Planned Hours',
+    'actual_hours': 'Actual Hours',
+    'efficiency': 'Efficiency Ratio'
+}
+CUSTOMER_CHART_COLORSCALE = px.colors.diverging.RdYlGn
+CUSTOMER_CHART_LAYOUT = dict(
+    height=400,
+    plot_bgcolor='white',
+    margin=dict(l=20, r=20, t=50, b=20),
+    legend=dict(orientation='h'),
+    hovermode='closest'
+)
+CHART_GRID_AXIS = dict(
+    showgrid=True, 
+    gridwidth=1, 
+    gridcolor='#f0f0f0',
+    zeroline=True,
+    zerolinewidth=1,
+    zerolinecolor='#e0e0e0'
+)
+EFFICIENCY_PIE_COLORS = ['#38b000', '#e5383b', '#3a86ff']
+# Centre text colour indexed by int(efficiency >= 60) + int(efficiency > 80): red, amber, green
+EFFICIENCY_TEXT_COLORS = ('#e5383b', '#f9c74f', '#38b000')
+# Validated once at import; each efficiency chart only patches its centre annotation
+EFFICIENCY_PIE_LAYOUT = go.Layout(
+    showlegend=True,
+    height=350,
+    margin=dict(t=10, b=10, l=10, r=10),
+    legend=dict(
+        orientation="h",
+        yanchor="bottom",
+        y=-0.2,
+        xanchor="center",
+        x=0.5
+    )
+)
 
 # ---------- FUNCTION DEFINITIONS ---------- #
 # Function to fetch and process data
@@ -24,8 +77,14 @@ def get_dashboard_data():
         yearly_summary = load_yearly_summary()
         summary_metrics = load_summary_metrics()
         customer_data = load_customer_profitability()
+        # Build the profit table once so cached reruns hand charts a columnar frame
+        customer_data["profit_data"] = pd.DataFrame(customer_data["profit_data"])
         workcenter_data = load_workcenter_trends()
-        top_overruns = load_top_overruns()
+        # Tabulate the overruns once so the year filter can use vectorized string matching
+        top_overruns = pd.DataFrame.from_records(load_top_overruns(), columns=[
+            "job_number", "part_name", "work_center", "task_description",
+            "planned_hours", "actual_hours", "overrun_hours", "overrun_cost"
+        ])
         
         return {
             "yearly_summary": yearly_summary,
@@ -40,74 +99,87 @@ def get_dashboard_data():
         traceback.print_exc()
         return None
 
+# Function to fetch the customer profit table for one year
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_filtered_profit_data(year_filter="All Years"):
+    """Return the cached customer profit table filtered to a single year"""
+    data = get_dashboard_data()
+    if data is None:
+        return pd.DataFrame()
+    
+    profit_df = data["customer_data"]["profit_data"]
+    if year_filter != "All Years" and 'year' in profit_df.columns:
+        profit_df = profit_df[profit_df['year'] == year_filter]
+    elif year_filter != "All Years" and 'operation_finish_date' in profit_df.columns:
+        # Try to extract year from date
+        profit_df = profit_df[profit_df['operation_finish_date'].dt.year == int(year_filter)]
+    
+    return profit_df
+
 # Function to create a better customer profitability chart
+@st.cache_data(ttl=3600, show_spinner=False)
 def create_enhanced_customer_chart(profit_data, year_filter="All Years"):
-    """Create an enhanced version of the customer profitability chart with year filtering"""
-    if not profit_data or len(profit_data) == 0:
-        # Return empty figure if no data
-        return px.scatter(title="No customer data available")
+    """Create an enhanced version of the customer profitability chart for an already year-filtered table"""
+    if profit_data is None or len(profit_data) == 0:
+        # Return empty figure if no data (or nothing left after the year filter)
+        message = "No customer data available" if year_filter == "All Years" else f"No customer data available for {year_filter}"
+        return create_empty_chart(message)
     
     # Convert to DataFrame if it's a list
     if isinstance(profit_data, list):
         df = pd.DataFrame(profit_data)
     else:
-        df = profit_data.copy()
-    
-    # Apply year filter if it exists and is applicable
-    if year_filter != "All Years" and 'year' in df.columns:
-        df = df[df['year'] == year_filter]
-    elif year_filter != "All Years" and 'operation_finish_date' in df.columns:
-        # Try to extract year from date
-        df = df[df['operation_finish_date'].dt.year == int(year_filter)]
-    
-    # If after filtering we have no data, return empty chart
-    if len(df) == 0:
-        fig = px.scatter(
-            title=f"No customer data available for {year_filter}"
-        )
-        fig.update_layout(height=400)
-        return fig
+        df = profit_data
     
     # Keep only the top 10 customers by absolute profitability
-    if len(df) > 10:
-        df = df.iloc[:10].copy()
+    if 'profitability' in df.columns:
+        df = df.loc[df['profitability'].abs().nlargest(10).index]
+    df = df.iloc[:10].reset_index(drop=True)
     
     # Determine bubble size based on planned_hours
     max_planned = df['planned_hours'].max() if 'planned_hours' in df.columns else 100
     
     # Determine color based on profitability
-    df['efficiency'] = df.apply(
-        lambda x: x['planned_hours'] / x['actual_hours'] if x['actual_hours'] > 0 else 1.0, 
-        axis=1
-    )
+    planned = df['planned_hours'].to_numpy(dtype=np.float64)
+    actual = df['actual_hours'].to_numpy(dtype=np.float64)
+    df['efficiency'] = np.where(actual > 0, planned / np.where(actual > 0, actual, 1), 1.0)
     
     # Create bubble size proportional to total hours
-    df['bubble_size'] = df['planned_hours'] / max_planned * 50 + 10
-    
-    # Create scatter plot with bubbles
-    fig = px.scatter(
-        df, 
-        x='planned_hours', 
-        y='actual_hours',
-        color='efficiency',
-        size='bubble_size',
-        hover_name='customer',
-        labels={
-            'planned_hours': 'Planned Hours',
-            'actual_hours': 'Actual Hours',
-            'efficiency': 'Efficiency Ratio'
-        },
-        color_continuous_scale=px.colors.diverging.RdYlGn,
-        range_color=[0.7, 1.3],  # Green for >1, Red for <1
-        title=f"Customer Hours & Efficiency {'' if year_filter == 'All Years' else '- ' + year_filter}"
-    )
+    df['bubble_size'] = planned / max_planned * 50 + 10
+    
+    # Create WebGL scatter plot with bubbles, sized by area like px.scatter (20px max diameter).
+    # Trace arrays are float32 so plotly ships them as half-size base64 typed arrays.
+    bubble_size = df['bubble_size'].to_numpy(dtype=np.float32)
+    fig = go.Figure(go.Scattergl(
+        x=planned.astype(np.float32),
+        y=actual.astype(np.float32),
+        mode='markers',
+        marker=dict(
+            size=bubble_size,
+            sizemode='area',
+            sizeref=bubble_size.max() / 20 ** 2,
+            color=df['efficiency'].to_numpy(dtype=np.float32),
+            colorscale=CUSTOMER_CHART_COLORSCALE,
+            cmin=0.7,  # Green for >1, Red for <1
+            cmax=1.3,
+            colorbar=dict(title=CUSTOMER_CHART_LABELS['efficiency']),
+            showscale=True
+        ),
+        hovertext=df['customer'].to_list(),
+        hovertemplate=(
+            '<b>%{hovertext}</b><br><br>'
+            f"{CUSTOMER_CHART_LABELS['planned_hours']}=%{{x:.1f}}<br>"
+            f"{CUSTOMER_CHART_LABELS['actual_hours']}=%{{y:.1f}}<br>"
+            f"{CUSTOMER_CHART_LABELS['efficiency']}=%{{marker.color:.2f}}<extra></extra>"
+        )
+    ))
     
     # Add reference line (y = x) where planned = actual
     x_range = [0, df['planned_hours'].max() * 1.1]
     y_range = [0, df['actual_hours'].max() * 1.1]
     max_range = max(x_range[1], y_range[1])
     
-    fig.add_shape(
+    reference_line = dict(
         type='line',
         x0=0,
         y0=0,
@@ -117,74 +189,59 @@ def create_enhanced_customer_chart(profit_data, year_filter="All Years"):
         name='Perfect Efficiency (Planned = Actual)'
     )
     
-    # Add annotations for key customers
-    for i, row in df.iterrows():
-        if i < 5:  # Only label top 5
-            fig.add_annotation(
-                x=row['planned_hours'],
-                y=row['actual_hours'],
-                text=row['list_name'] if 'list_name' in row else row['customer'][:10],
-                showarrow=True,
-                arrowhead=2,
-                arrowsize=1,
-                arrowcolor="#636363",
-                ax=-15,
-                ay=-25
-            )
-    
-    # Improve layout
-    fig.update_layout(
-        height=400,
-        plot_bgcolor='white',
-        margin=dict(l=20, r=20, t=50, b=20),
-        legend=dict(orientation='h'),
-        hovermode='closest'
-    )
+    # Add annotations for key customers (only label top 5)
+    has_list_name = 'list_name' in df.columns
+    annotations = [
+        dict(
+            x=row.planned_hours,
+            y=row.actual_hours,
+            text=row.list_name if has_list_name else row.customer[:10],
+            showarrow=True,
+            arrowhead=2,
+            arrowsize=1,
+            arrowcolor="#636363",
+            ax=-15,
+            ay=-25
+        )
+        for row in df.head(5).itertuples(index=False)
+    ]
     
     # Add explanatory text
-    fig.add_annotation(
-        xref="paper", yref="paper",
-        x=0.01, y=0.99,
-        text="Above line = Overrun",
-        showarrow=False,
-        font=dict(size=12, color="#e5383b")
-    )
-    
-    fig.add_annotation(
-        xref="paper", yref="paper",
-        x=0.01, y=0.94,
-        text="Below line = Under Budget",
-        showarrow=False,
-        font=dict(size=12, color="#38b000")
-    )
-    
-    # Better axis configuration
-    fig.update_xaxes(
-        showgrid=True, 
-        gridwidth=1, 
-        gridcolor='#f0f0f0',
-        zeroline=True,
-        zerolinewidth=1,
-        zerolinecolor='#e0e0e0'
-    )
+    annotations += [
+        dict(
+            xref="paper", yref="paper",
+            x=0.01, y=0.99,
+            text="Above line = Overrun",
+            showarrow=False,
+            font=dict(size=12, color="#e5383b")
+        ),
+        dict(
+            xref="paper", yref="paper",
+            x=0.01, y=0.94,
+            text="Below line = Under Budget",
+            showarrow=False,
+            font=dict(size=12, color="#38b000")
+        )
+    ]
     
-    fig.update_yaxes(
-        showgrid=True, 
-        gridwidth=1, 
-        gridcolor='#f0f0f0',
-        zeroline=True,
-        zerolinewidth=1,
-        zerolinecolor='#e0e0e0'
+    # Improve layout and axis configuration in a single validation pass
+    fig.update_layout(
+        **CUSTOMER_CHART_LAYOUT,
+        title=f"Customer Hours & Efficiency {'' if year_filter == 'All Years' else '- ' + year_filter}",
+        xaxis=dict(title=CUSTOMER_CHART_LABELS['planned_hours'], **CHART_GRID_AXIS),
+        yaxis=dict(title=CUSTOMER_CHART_LABELS['actual_hours'], **CHART_GRID_AXIS),
+        shapes=[reference_line],
+        annotations=annotations
     )
     
     return fig
 
 # Function to create an improved efficiency breakdown chart
+@st.cache_data(ttl=3600, show_spinner=False)
 def create_enhanced_efficiency_chart(total_planned, total_actual):
     """Create an enhanced version of the efficiency breakdown chart"""
     # Calculate metrics
-    total_overrun = max(0, total_actual - total_planned)
-    total_underrun = max(0, total_planned - total_actual)
+    total_overrun, total_underrun = np.maximum(0, [total_actual - total_planned, total_planned - total_actual])
     on_target = total_planned - total_overrun - total_underrun
     
     # Calculate percentages for clearer understanding
@@ -206,37 +263,24 @@ def create_enhanced_efficiency_chart(total_planned, total_actual):
     
     values = [on_target, total_overrun, total_underrun]
     
-    # Better colors with higher contrast
-    colors = ['#38b000', '#e5383b', '#3a86ff']
-    
     # Create pie chart with better styling
     fig = go.Figure(data=[go.Pie(
         labels=labels,
         values=values,
         hole=.6,
-        marker=dict(colors=colors),
+        marker=dict(colors=EFFICIENCY_PIE_COLORS),
         textinfo='percent',
         textfont=dict(size=14),
         insidetextorientation='horizontal',
         hoverinfo='label+value+percent',
         hovertemplate='%{label}<br>Hours: %{value:.1f}<br>Percent: %{percent}<extra></extra>'
-    )])
+    )], layout=EFFICIENCY_PIE_LAYOUT)
     
     # Add total values to center
     total_efficiency = on_target_pct
-    text_color = "#38b000" if total_efficiency > 80 else "#e5383b" if total_efficiency < 60 else "#f9c74f"
+    text_color = EFFICIENCY_TEXT_COLORS[int(total_efficiency >= 60) + int(total_efficiency > 80)]
     
     fig.update_layout(
-        showlegend=True,
-        height=350,
-        margin=dict(t=10, b=10, l=10, r=10),
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=-0.2,
-            xanchor="center",
-            x=0.5
-        ),
         annotations=[dict(
             text=f"<b>{total_efficiency:.1f}%</b><br>Efficiency",
             x=0.5, y=0.5,
@@ -247,6 +291,203 @@ def create_enhanced_efficiency_chart(total_planned, total_actual):
     
     return fig
 
+# Function to create the multi-year hours trend chart
+@st.cache_data(ttl=3600, show_spinner=False)
+def create_hours_trend_chart(df_trend):
+    """Create the grouped planned/actual/overrun bar chart from a per-year frame"""
+    # One bar trace per series instead of px melting the frame to long form first
+    fig = go.Figure(
+        data=[
+            go.Bar(
+                x=df_trend['year'],
+                y=df_trend[col],
+                name=col,
+                marker_color=color,
+                hovertemplate=f"variable={col}<br>year=%{{x}}<br>value=%{{y}}<extra></extra>"
+            )
+            for col, color in zip(['Planned Hours', 'Actual Hours', 'Overrun Hours'], ['#8884d8', '#82ca9d', '#ff8042'])
+        ]
+    )
+    
+    fig.update_layout(
+        barmode='group',
+        legend=dict(title_text='variable', tracegroupgap=0),
+        xaxis_title='year',
+        yaxis_title='value',
+        plot_bgcolor='white',
+        margin=dict(l=20, r=20, t=20, b=20),
+        height=300
+    )
+    
+    return fig
+
+# Function to strip year links down to plain year labels
+@st.cache_data(ttl=3600, show_spinner=False)
+def clean_year_series(year_values):
+    """Return plain year labels for a tuple of years, unwrapping "[2023](/Yearly_Analysis?year=2023)" style links"""
+    year_strings = pd.Series(year_values, dtype=object).astype(str)
+    return year_strings.str.extract(YEAR_LINK_PATTERN, expand=False).fillna(year_strings).tolist()
+
+# Function to derive the yearly performance table
+@st.cache_data(ttl=3600, show_spinner=False)
+def build_yearly_performance_table(display_df):
+    """Add efficiency, overrun, trend and insight columns to the renamed yearly summary"""
+    display_df = display_df.copy()
+    
+    # Clean up any complex data types; only object columns can hold them
+    for col in display_df.select_dtypes(include='object').columns:
+        is_complex = display_df[col].map(type).isin([dict, list])
+        if is_complex.any():
+            display_df.loc[is_complex, col] = display_df.loc[is_complex, col].map(
+                lambda x: str(sum(x.values())) if isinstance(x, dict) else str(sum(x))
+            )
+    
+    # Convert columns to numeric if necessary; unparseable cells become 0
+    for col in ['Planned', 'Actual']:
+        if col in display_df.columns and display_df[col].dtype == 'object':
+            display_df[col] = pd.to_numeric(
+                display_df[col].astype(str).str.replace(',', '', regex=False), errors='coerce'
+            ).fillna(0.0)
+    
+    # Add derived metrics as whole-column operations; rows with missing or zero hours fall back to 0
+    planned = display_df['Planned'].to_numpy(dtype=np.float64)
+    actual = display_df['Actual'].to_numpy(dtype=np.float64)
+    over_h = np.nan_to_num(actual - planned)
+    eff = np.divide(planned * 100.0, actual, out=np.zeros_like(planned), where=(actual > 0) & ~np.isnan(planned))
+    over_pct = np.divide(over_h * 100.0, planned, out=np.zeros_like(planned), where=planned > 0)
+    
+    display_df['Efficiency'] = pd.Series(eff, index=display_df.index).map("{:.1f}%".format)
+    
+    if 'Overrun' not in display_df.columns:
+        display_df['Overrun'] = over_h
+    
+    if 'Overrun %' not in display_df.columns:
+        display_df['Overrun %'] = pd.Series(over_pct, index=display_df.index).map("{:.1f}%".format)
+    
+    # Add trend indicators by comparing to previous year (at the displayed 0.1% precision)
+    pct_change = np.diff(np.round(over_pct, 1), prepend=np.nan)
+    trend = np.where(pct_change < 0, '↓ Improved', np.where(pct_change > 0, '↑ Declined', '→ No Change'))
+    trend[0] = ''
+    display_df['Trend'] = trend
+    
+    # Generate insights based on the displayed values (first matching bucket wins)
+    eff_shown = np.round(eff, 1)
+    display_df['Key Insight'] = np.select(
+        [eff_shown > 95, eff_shown > 90, eff_shown > 80, np.round(over_pct, 1) > 25],
+        ['Excellent performance', 'Good resource utilization', 'Average performance', 'Significant overruns'],
+        default='Needs improvement'
+    )
+    
+    # Keep numeric shadows of the displayed metrics so the insights panel never re-parses strings
+    display_df['_eff_num'] = eff_shown
+    display_df['_over_pct_num'] = np.round(over_pct, 1)
+    display_df['_planned_num'] = np.nan_to_num(planned)
+    display_df['_actual_num'] = np.nan_to_num(actual)
+    display_df['_overrun_num'] = pd.to_numeric(display_df['Overrun'], errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+    
+    # Create clickable year links for navigation
+    if 'Year' in display_df.columns:
+        # Store original Year values before formatting for selection
+        display_df['Year_Value'] = display_df['Year']
+    
+    return display_df
+
+# Function to render the key metrics box for a single year
+@st.cache_data(ttl=3600, show_spinner=False)
+def render_year_metrics_html(planned, actual, overrun, jobs):
+    """Render the yearly key metrics box from already formatted values"""
+    rows = [
+        ("Planned Hours", planned),
+        ("Actual Hours", actual),
+        ("Overrun Hours", overrun),
+        ("Jobs Completed", jobs)
+    ]
+    return "".join([
+        '<div style="background-color: #f8f9fa; padding: 15px; border-radius: 5px; margin-bottom: 15px;">',
+        *(
+            f'<div style="display: flex; justify-content: space-between;{" margin-bottom: 10px;" if i < len(rows) - 1 else ""}">'
+            f'<span>{label}:</span><span><strong>{value}</strong></span></div>'
+            for i, (label, value) in enumerate(rows)
+        ),
+        '</div>'
+    ])
+
+# Function to create the efficiency gauge for the insights panel
+@st.cache_resource(show_spinner=False)
+def create_efficiency_gauge(efficiency):
+    """Create the efficiency gauge; shared across reruns and sessions, so callers must not mutate it"""
+    fig = go.Figure(go.Indicator(
+        mode = "gauge+number",
+        value = efficiency,
+        title = {'text': "Efficiency"},
+        domain = {'x': [0, 1], 'y': [0, 1]},
+        gauge = {
+            'axis': {'range': [0, 100], 'tickwidth': 1},
+            'bar': {'color': "#00b4d8"},
+            'steps': [
+                {'range': [0, 60], 'color': "#e5383b"},
+                {'range': [60, 80], 'color': "#ffb703"},
+                {'range': [80, 100], 'color': "#52b788"}
+            ],
+            'threshold': {
+                'line': {'color': "red", 'width': 4},
+                'thickness': 0.75,
+                'value': 95
+            }
+        }
+    ))
+    fig.update_layout(height=200, margin=dict(l=10, r=10, t=30, b=10))
+    
+    return fig
+
+# Function to build the top overrun jobs table for one year
+@st.cache_data(ttl=3600, show_spinner=False)
+def build_top_overruns_table(top_overruns, selected_year):
+    """Return the top 5 overrun jobs for a year as display strings, plus CSS for the Overrun % column"""
+    # Filter based on selected year
+    filtered_overruns = top_overruns
+    if selected_year != "All Years":
+        # This assumes job_number contains year information or there's a separate year field
+        if 'year' in filtered_overruns.columns:
+            year_mask = filtered_overruns['year'].astype(str) == str(selected_year)
+        else:
+            job_numbers = filtered_overruns['job_number']
+            year_mask = (
+                job_numbers.str.contains(str(selected_year), regex=False, na=False)
+                if pd.api.types.is_object_dtype(job_numbers) else pd.Series(False, index=job_numbers.index)
+            )
+        filtered_overruns = filtered_overruns[year_mask]
+    
+    # Get top 5 overruns after filtering, without relying on the loader's sort order
+    jobs_src = filtered_overruns.nlargest(5, 'overrun_hours')
+    planned_hours = jobs_src["planned_hours"].to_numpy(dtype=np.float64)
+    overrun_hours = jobs_src["overrun_hours"].to_numpy(dtype=np.float64)
+    overrun_pcts = np.divide(overrun_hours, planned_hours, out=np.zeros_like(planned_hours), where=planned_hours > 0)
+    jobs_df = pd.DataFrame({
+        "Job Number": jobs_src["job_number"],
+        "Part Name": jobs_src["part_name"],
+        "Overrun %": [format_percent(pct) for pct in overrun_pcts],
+        "Overrun Hours": [format_number(hours) for hours in overrun_hours]
+    })
+    
+    # Color-code the overrun percentage column from the numeric values it displays
+    overrun_pcts = np.round(overrun_pcts, 1)
+    overrun_styles = np.where(
+        overrun_pcts > 50, 'background-color: #ffcccb',  # Red for high overruns
+        np.where(overrun_pcts > 20, 'background-color: #ffffcc', '')  # Yellow for medium overruns
+    )
+    
+    return jobs_df, overrun_styles
+
+# Function to render a row of summary metric cards as a single HTML block
+def render_metric_cards(cards):
+    """Render (label, value, color) tuples as one flex row of metric cards"""
+    return (
+        '<div style="display: flex; gap: 1rem;">'
+        + ''.join(METRIC_CARD_TEMPLATE.format(label=label, value=value, color=color) for label, value, color in cards)
+        + '</div>'
+    )
+
 # Function to create a clickable year link
 def make_year_link(year):
     return f"[{year}](/Yearly_Analysis?year={year})"
@@ -259,9 +500,11 @@ def style_dataframe(df):
     # Simplify any dictionary-like values before formatting
     for col in df.columns:
         if df[col].dtype == 'object':
-            df_styled[col] = df_styled[col].apply(
-                lambda x: x if not isinstance(x, dict) else f"Total: {sum(x.values()):.1f}"
-            )
+            is_dict = df[col].map(lambda x: isinstance(x, dict))
+            if is_dict.any():
+                df_styled.loc[is_dict, col] = df.loc[is_dict, col].map(
+                    lambda x: f"Total: {sum(x.values()):.1f}"
+                )
     
     # Check which columns are numeric vs string
     numeric_cols = []
@@ -269,11 +512,10 @@ def style_dataframe(df):
     
     for col in ['Planned', 'Actual', 'Overrun']:
         if col in df_styled.columns:
-            # Check if column values can be converted to numeric
-            try:
-                pd.to_numeric(df_styled[col])
+            # Only columns that are already numeric can take a numeric format
+            if pd.api.types.is_numeric_dtype(df_styled[col]):
                 numeric_cols.append(col)
-            except:
+            else:
                 string_cols.append(col)
     
     # Apply formatting based on data type
@@ -320,6 +562,15 @@ def style_dataframe(df):
     
     return df_style
 
+# Function to list the Excel files in a directory for the troubleshooting panel
+@st.cache_data(ttl=60, show_spinner=False)
+def find_excel_files(directory):
+    """Return the names of .xlsx files directly inside directory (empty if it doesn't exist)"""
+    if not os.path.isdir(directory):
+        return []
+    with os.scandir(directory) as entries:
+        return [entry.name for entry in entries if entry.name.endswith(".xlsx") and entry.is_file()]
+
 # -------- END OF FUNCTION DEFINITIONS -------- #
 
 # Set page configuration
@@ -520,106 +771,29 @@ if data:
     st.header("📊 Summary Metrics")
     st.caption(f"Last updated: {datetime.now().strftime('%b %d, %Y %H:%M')}")
     
+    # Unpack the summary metrics once for the cards and the efficiency breakdown
+    summary_metrics = data["summary_metrics"]
+    total_planned_hours = summary_metrics["total_planned_hours"]
+    total_actual_hours = summary_metrics["total_actual_hours"]
+    total_planned_cost = summary_metrics["total_planned_cost"]
+    total_actual_cost = summary_metrics["total_actual_cost"]
+    overrun_cost = total_actual_cost - total_planned_cost
+    
     # Top row metrics using the styled metric cards
-    col1, col2, col3, col4 = st.columns(4)
-    with col1:
-        st.markdown(f"""
-        <div class="metric-card">
-            <div class="metric-label">Planned Hours</div>
-            <div class="metric-value">{format_number(data["summary_metrics"]["total_planned_hours"])}</div>
-            <div style="position: absolute; top: 0; right: 0; width: 30px; height: 30px; background-color: #3f51b5; 
-                      color: white; display: flex; align-items: center; justify-content: center; border-radius: 0 8px 0 8px;">
-                <span style="font-size: 18px;">ℹ️</span>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-
-    with col2:
-        st.markdown(f"""
-        <div class="metric-card">
-            <div class="metric-label">Actual Hours</div>
-            <div class="metric-value">{format_number(data["summary_metrics"]["total_actual_hours"])}</div>
-            <div style="position: absolute; top: 0; right: 0; width: 30px; height: 30px; background-color: #9c27b0; 
-                      color: white; display: flex; align-items: center; justify-content: center; border-radius: 0 8px 0 8px;">
-                <span style="font-size: 18px;">ℹ️</span>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-
-    with col3:
-        st.markdown(f"""
-        <div class="metric-card">
-            <div class="metric-label">Overrun Hours</div>
-            <div class="metric-value">{format_number(data["summary_metrics"]["total_overrun_hours"])}</div>
-            <div style="position: absolute; top: 0; right: 0; width: 30px; height: 30px; background-color: #ff9800; 
-                      color: white; display: flex; align-items: center; justify-content: center; border-radius: 0 8px 0 8px;">
-                <span style="font-size: 18px;">ℹ️</span>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-
-    with col4:
-        st.markdown(f"""
-        <div class="metric-card">
-            <div class="metric-label">NCR Hours</div>
-            <div class="metric-value">{format_number(data["summary_metrics"]["total_ncr_hours"])}</div>
-            <div style="position: absolute; top: 0; right: 0; width: 30px; height: 30px; background-color: #f44336; 
-                      color: white; display: flex; align-items: center; justify-content: center; border-radius: 0 8px 0 8px;">
-                <span style="font-size: 18px;">ℹ️</span>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
+    st.markdown(render_metric_cards([
+        ("Planned Hours", format_number(total_planned_hours), "#3f51b5"),
+        ("Actual Hours", format_number(total_actual_hours), "#9c27b0"),
+        ("Overrun Hours", format_number(summary_metrics["total_overrun_hours"]), "#ff9800"),
+        ("NCR Hours", format_number(summary_metrics["total_ncr_hours"]), "#f44336")
+    ]), unsafe_allow_html=True)
     
     # Bottom row metrics using the styled metric cards
-    col1, col2, col3, col4 = st.columns(4)
-    with col1:
-        st.markdown(f"""
-        <div class="metric-card">
-            <div class="metric-label">Planned Cost</div>
-            <div class="metric-value">{format_money(data["summary_metrics"]["total_planned_cost"])}</div>
-            <div style="position: absolute; top: 0; right: 0; width: 30px; height: 30px; background-color: #673ab7; 
-                      color: white; display: flex; align-items: center; justify-content: center; border-radius: 0 8px 0 8px;">
-                <span style="font-size: 18px;">ℹ️</span>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-
-    with col2:
-        st.markdown(f"""
-        <div class="metric-card">
-            <div class="metric-label">Actual Cost</div>
-            <div class="metric-value">{format_money(data["summary_metrics"]["total_actual_cost"])}</div>
-            <div style="position: absolute; top: 0; right: 0; width: 30px; height: 30px; background-color: #e91e63; 
-                      color: white; display: flex; align-items: center; justify-content: center; border-radius: 0 8px 0 8px;">
-                <span style="font-size: 18px;">ℹ️</span>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-
-    with col3:
-        overrun_cost = data["summary_metrics"]["total_actual_cost"] - data["summary_metrics"]["total_planned_cost"]
-        st.markdown(f"""
-        <div class="metric-card">
-            <div class="metric-label">Overrun Cost</div>
-            <div class="metric-value">{format_money(overrun_cost)}</div>
-            <div style="position: absolute; top: 0; right: 0; width: 30px; height: 30px; background-color: #00bcd4; 
-                      color: white; display: flex; align-items: center; justify-content: center; border-radius: 0 8px 0 8px;">
-                <span style="font-size: 18px;">ℹ️</span>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-
-    with col4:
-        st.markdown(f"""
-        <div class="metric-card">
-            <div class="metric-label">Total Jobs</div>
-            <div class="metric-value">{format_number(data["summary_metrics"]["total_jobs"], 0)}</div>
-            <div style="position: absolute; top: 0; right: 0; width: 30px; height: 30px; background-color: #4caf50; 
-                      color: white; display: flex; align-items: center; justify-content: center; border-radius: 0 8px 0 8px;">
-                <span style="font-size: 18px;">ℹ️</span>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
+    st.markdown(render_metric_cards([
+        ("Planned Cost", format_money(total_planned_cost), "#673ab7"),
+        ("Actual Cost", format_money(total_actual_cost), "#e91e63"),
+        ("Overrun Cost", format_money(overrun_cost), "#00bcd4"),
+        ("Total Jobs", format_number(summary_metrics["total_jobs"], 0), "#4caf50")
+    ]), unsafe_allow_html=True)
 
     st.divider()
     
@@ -635,37 +809,34 @@ if data:
             st.subheader("Year Summary", divider="blue")
             yearly_df = pd.DataFrame(data["yearly_summary"])
             
-            # Format columns for display
-            display_df = yearly_df.copy()
-            if not display_df.empty and 'planned_hours' in display_df.columns:
-                for col in ['planned_hours', 'actual_hours', 'overrun_hours', 'ncr_hours']:
-                    if col in display_df.columns:
-                        display_df[col] = display_df[col].apply(lambda x: format_number(x) if x is not None else "0")
-                
-                for col in ['job_count', 'operation_count', 'customer_count']:
-                    if col in display_df.columns:
-                        display_df[col] = display_df[col].apply(lambda x: format_number(x, 0) if x is not None else "0")
+            # Rename columns for better display; rename returns a new frame so yearly_df stays untouched
+            column_mapping = {
+                "year": "Year",
+                "planned_hours": "Planned",
+                "actual_hours": "Actual",
+                "overrun_hours": "Overrun",
+                "ncr_hours": "NCR",
+                "job_count": "Jobs",
+                "operation_count": "Ops",
+                "customer_count": "Customers"
+            }
+            display_df = yearly_df.rename(columns=column_mapping)
+            if not display_df.empty and 'Planned' in display_df.columns:
+                # Keep columns numeric and let st.dataframe format them client-side
+                hour_cols = [col for col in ['Planned', 'Actual', 'Overrun', 'NCR'] if col in display_df.columns]
+                display_df[hour_cols] = display_df[hour_cols].fillna(0).round(1)
                 
-                # Rename columns for better display
-                column_mapping = {
-                    "year": "Year",
-                    "planned_hours": "Planned",
-                    "actual_hours": "Actual",
-                    "overrun_hours": "Overrun",
-                    "ncr_hours": "NCR",
-                    "job_count": "Jobs",
-                    "operation_count": "Ops",
-                    "customer_count": "Customers"
-                }
+                count_cols = [col for col in ['Jobs', 'Ops', 'Customers'] if col in display_df.columns]
+                display_df[count_cols] = display_df[count_cols].fillna(0).astype(int)
                 
-                # Only rename columns that exist
-                rename_cols = {k: v for k, v in column_mapping.items() if k in display_df.columns}
-                display_df = display_df.rename(columns=rename_cols)
+                number_config = {col: st.column_config.NumberColumn(format="%.1f") for col in hour_cols}
+                number_config.update({col: st.column_config.NumberColumn(format="%d") for col in count_cols})
                 
                 st.dataframe(
                     display_df,
                     use_container_width=True,
-                    hide_index=True
+                    hide_index=True,
+                    column_config=number_config
                 )
             else:
                 st.write("No yearly summary data available")
@@ -779,7 +950,7 @@ if data:
                     )
                 
                 # Replace the existing customer chart with simplified version
-                if data["customer_data"]["profit_data"]:
+                if not data["customer_data"]["profit_data"].empty:
                     customer_chart = create_simplified_customer_chart(
                         data["customer_data"]["profit_data"], 
                         year_filter=selected_year,
@@ -802,7 +973,7 @@ if data:
             
             with customer_tab2:
                 # Display common work types by customer
-                if data["customer_data"]["profit_data"]:
+                if not data["customer_data"]["profit_data"].empty:
                     # Get customer data
                     cust_data = data["customer_data"]["profit_data"]
                     
@@ -811,14 +982,10 @@ if data:
                     st.subheader("Work Type Distribution by Customer")
                     
                     # Create a fake work type distribution for demonstration
-                    if isinstance(cust_data, list) and len(cust_data) > 0:
+                    if len(cust_data) > 0:
                         # Get customers
-                        customers = []
-                        for item in cust_data:
-                            if 'list_name' in item:
-                                customers.append(item['list_name'])
-                            elif 'customer' in item:
-                                customers.append(item['customer'])
+                        name_col = 'list_name' if 'list_name' in cust_data.columns else 'customer'
+                        customers = cust_data[name_col].tolist()
                         
                         # Take top 5 customers
                         top_customers = customers[:5] if len(customers) > 5 else customers
@@ -872,8 +1039,8 @@ if data:
             
             with customer_tab3:
                 # Show the original bubbles chart for those who want the detail
-                if data["customer_data"]["profit_data"]:
-                    customer_chart = create_enhanced_customer_chart(data["customer_data"]["profit_data"], selected_year)
+                if not data["customer_data"]["profit_data"].empty:
+                    customer_chart = create_enhanced_customer_chart(get_filtered_profit_data(selected_year), selected_year)
                     st.plotly_chart(customer_chart, use_container_width=True)
                     
                     st.caption("Original visualization with all details")
@@ -929,6 +1096,9 @@ if data:
             # Work center visualization
             st.subheader("Work Center Performance", divider="gray")
             
+            # Build the work center frame once; every tab reads from it
+            wc_df = pd.DataFrame(data["workcenter_data"]["work_center_data"])
+            
             # Create tabs for different views
             tab1, tab2, tab3 = st.tabs(["ROI Analysis", "Hours Breakdown", "Efficiency"])
             
@@ -951,7 +1121,6 @@ if data:
                     )
                 
                 # Use the new ROI chart
-                wc_df = pd.DataFrame(data["workcenter_data"]["work_center_data"])
                 roi_chart = create_workcenter_roi_chart(wc_df, sort_by=roi_sort_by)
                 st.plotly_chart(roi_chart, use_container_width=True)
                 
@@ -1029,8 +1198,8 @@ if data:
                     st.info("No work center hours data available")
             
             with tab3:
-                # Format columns for display and show in table view
-                display_wc_df = wc_df.copy() if not wc_df.empty else pd.DataFrame()
+                # Show the work center frame as-is; st.dataframe handles labels and number formatting
+                display_wc_df = wc_df
                 
                 if not display_wc_df.empty:
                     # Calculate efficiency if not present
@@ -1040,39 +1209,9 @@ if data:
                             axis=1
                         )
                     
-                    # Format numeric columns
-                    for col in ['planned_hours', 'actual_hours', 'overrun_hours']:
-                        if col in display_wc_df.columns:
-                            display_wc_df[col] = display_wc_df[col].apply(lambda x: f"{x:.1f}" if x is not None else "0")
-                    
-                    # Format percentage columns
-                    for col in ['efficiency', 'utilization', 'overrun_percent']:
-                        if col in display_wc_df.columns:
-                            display_wc_df[col] = display_wc_df[col].apply(lambda x: f"{x:.1f}%" if x is not None else "0%")
-                    
-                    # Rename columns for better display
-                    column_mapping = {
-                        "work_center": "Work Center",
-                        "planned_hours": "Planned",
-                        "actual_hours": "Actual",
-                        "overrun_hours": "Overrun",
-                        "efficiency": "Efficiency",
-                        "utilization": "Utilization",
-                        "overrun_percent": "Overrun %"
-                    }
-                    
-                    # Only rename columns that exist
-                    rename_cols = {k: v for k, v in column_mapping.items() if k in display_wc_df.columns}
-                    display_wc_df = display_wc_df.rename(columns=rename_cols)
-                    
                     # Sort by efficiency
-                    if 'Efficiency' in display_wc_df.columns:
-                        # Extract numeric value from formatted string for sorting
-                        display_wc_df['Efficiency_sort'] = display_wc_df['Efficiency'].apply(
-                            lambda x: float(x.replace('%', '')) if isinstance(x, str) else x
-                        )
-                        display_wc_df = display_wc_df.sort_values('Efficiency_sort', ascending=False)
-                        display_wc_df = display_wc_df.drop('Efficiency_sort', axis=1)
+                    if 'efficiency' in display_wc_df.columns:
+                        display_wc_df = display_wc_df.sort_values('efficiency', ascending=False)
                     
                     # Show dataframe with conditional formatting
                     st.dataframe(
@@ -1080,24 +1219,28 @@ if data:
                         use_container_width=True,
                         hide_index=True,
                         column_config={
-                            "Efficiency": st.column_config.ProgressColumn(
+                            "work_center": st.column_config.TextColumn("Work Center"),
+                            "planned_hours": st.column_config.NumberColumn("Planned", format="%.1f"),
+                            "actual_hours": st.column_config.NumberColumn("Actual", format="%.1f"),
+                            "overrun_hours": st.column_config.NumberColumn("Overrun", format="%.1f"),
+                            "efficiency": st.column_config.ProgressColumn(
                                 "Efficiency",
                                 help="How close actual hours were to planned hours",
-                                format="%s",
+                                format="%.1f%%",
                                 min_value=0,
                                 max_value=100
                             ),
-                            "Utilization": st.column_config.ProgressColumn(
+                            "utilization": st.column_config.ProgressColumn(
                                 "Utilization",
                                 help="Percentage of total shop hours",
-                                format="%s",
+                                format="%.1f%%",
                                 min_value=0,
                                 max_value=100
                             ),
-                            "Overrun %": st.column_config.NumberColumn(
+                            "overrun_percent": st.column_config.NumberColumn(
                                 "Overrun %",
                                 help="Percentage over planned hours",
-                                format="%s"
+                                format="%.1f%%"
                             )
                         }
                     )
@@ -1113,16 +1256,11 @@ if data:
     
     with st.container():
         # Create pie chart for efficiency breakdown
-        total_planned = data["summary_metrics"]["total_planned_hours"]
-        total_actual = data["summary_metrics"]["total_actual_hours"]
-        total_overrun = max(0, total_actual - total_planned)
-        total_underrun = max(0, total_planned - total_actual)
-        
         col1, col2 = st.columns([1, 2])
         
         with col1:
             # Replace the existing efficiency chart with enhanced version
-            efficiency_chart = create_enhanced_efficiency_chart(total_planned, total_actual)
+            efficiency_chart = create_enhanced_efficiency_chart(total_planned_hours, total_actual_hours)
             st.plotly_chart(efficiency_chart, use_container_width=True)
             
             with st.expander("About Efficiency Metrics"):
@@ -1155,53 +1293,19 @@ if data:
                 )
             
             # Filter overruns by year if a specific year is selected
-            if "top_overruns" in data and data.get("top_overruns", []):
-                # Filter based on selected year
-                filtered_overruns = data["top_overruns"]
-                if selected_year != "All Years":
-                    # This assumes job_number contains year information or there's a separate year field
-                    filtered_overruns = [
-                        job for job in data["top_overruns"] 
-                        if (hasattr(job, 'year') and job.year == selected_year) or 
-                           (isinstance(job.get('job_number', ''), str) and selected_year in job['job_number'])
-                    ]
+            if "top_overruns" in data and not data["top_overruns"].empty:
+                # Build the filtered top 5 table (cached per year)
+                jobs_df, overrun_styles = build_top_overruns_table(data["top_overruns"], selected_year)
                 
-                # Get top 5 overruns after filtering
-                top_overruns = filtered_overruns[:5] if len(filtered_overruns) > 5 else filtered_overruns
-                
-                # Create a dataframe for better display
-                jobs_data = []
-                for job in top_overruns:
-                    overrun_percent = (job["overrun_hours"] / job["planned_hours"] * 100) if job["planned_hours"] > 0 else 0
-                    jobs_data.append({
-                        "Job Number": job["job_number"],
-                        "Part Name": job["part_name"],
-                        "Overrun %": format_percent(overrun_percent/100),
-                        "Overrun Hours": format_number(job["overrun_hours"])
-                    })
-                
-                if jobs_data:
-                    jobs_df = pd.DataFrame(jobs_data)
-                    
-                    # Color-code the overrun percentage column
-                    def highlight_overruns(val):
-                        try:
-                            # Extract percent value
-                            pct = float(val.replace('%', ''))
-                            if pct > 50:
-                                return 'background-color: #ffcccb'  # Red for high overruns
-                            elif pct > 20:
-                                return 'background-color: #ffffcc'  # Yellow for medium overruns
-                            else:
-                                return ''
-                        except:
-                            return ''
-                    
-                    # Apply styling
-                    styled_df = jobs_df.style.applymap(
-                        highlight_overruns, 
-                        subset=['Overrun %']
-                    )
+                if not jobs_df.empty:
+                    # Apply styling only when a row is actually highlighted; otherwise skip the Styler entirely
+                    if overrun_styles.any():
+                        styled_df = jobs_df.style.apply(
+                            lambda col: overrun_styles, 
+                            subset=['Overrun %']
+                        )
+                    else:
+                        styled_df = jobs_df
                     
                     st.dataframe(styled_df, use_container_width=True, hide_index=True)
                     
@@ -1232,53 +1336,22 @@ if data:
     
     # Use data from yearly_summary if available, otherwise use mock data
     if yearly_df is not None and not yearly_df.empty:
-        years = yearly_df['year'].tolist()
-        planned = yearly_df['planned_hours'].tolist()
-        actual = yearly_df['actual_hours'].tolist()
-        overrun = yearly_df['overrun_hours'].tolist()
-        
-        # Create DataFrame for chart
-        trend_data = []
-        for i, year in enumerate(years):
-            trend_data.append({
-                'year': year,
-                'Planned Hours': planned[i],
-                'Actual Hours': actual[i],
-                'Overrun Hours': overrun[i]
-            })
+        df_trend = yearly_df.rename(columns={
+            'planned_hours': 'Planned Hours',
+            'actual_hours': 'Actual Hours',
+            'overrun_hours': 'Overrun Hours'
+        })[['year', 'Planned Hours', 'Actual Hours', 'Overrun Hours']]
     else:
         # Use mock data if no real data available
-        years = ['2019', '2020', '2021', '2022', '2023']
-        planned = [13000, 12500, 14000, 14500, 15000]
-        actual = [14000, 13500, 15000, 15500, 16000]
-        overrun = [1000, 1000, 1000, 1000, 1000]
-        
-        # Create DataFrame for chart
-        trend_data = []
-        for i, year in enumerate(years):
-            trend_data.append({
-                'year': year,
-                'Planned Hours': planned[i],
-                'Actual Hours': actual[i],
-                'Overrun Hours': overrun[i]
-            })
-    
-    df_trend = pd.DataFrame(trend_data)
-    
-    # Create grouped bar chart
-    fig = px.bar(
-        df_trend, 
-        x='year', 
-        y=['Planned Hours', 'Actual Hours', 'Overrun Hours'],
-        barmode='group',
-        color_discrete_sequence=['#8884d8', '#82ca9d', '#ff8042']
-    )
-    
-    fig.update_layout(
-        plot_bgcolor='white',
-        margin=dict(l=20, r=20, t=20, b=20),
-        height=300
-    )
+        df_trend = pd.DataFrame({
+            'year': ['2019', '2020', '2021', '2022', '2023'],
+            'Planned Hours': [13000, 12500, 14000, 14500, 15000],
+            'Actual Hours': [14000, 13500, 15000, 15500, 16000],
+            'Overrun Hours': [1000, 1000, 1000, 1000, 1000]
+        })
+    
+    # Create grouped bar chart (cached on the frame contents)
+    fig = create_hours_trend_chart(df_trend)
     st.plotly_chart(fig, use_container_width=True)
 
     # Yearly Summary Table section - Interactive Year Selection
@@ -1290,83 +1363,8 @@ if data:
         if 'selected_detail_year' not in st.session_state:
             st.session_state.selected_detail_year = None
         
-        # Clean up any complex data types
-        for col in display_df.columns:
-            display_df[col] = display_df[col].apply(
-                lambda x: x if not isinstance(x, (dict, list)) else str(sum(x.values())) if isinstance(x, dict) else str(sum(x))
-            )
-        
-        # Convert columns to numeric if necessary
-        for col in ['Planned', 'Actual']:
-            if col in display_df.columns and display_df[col].dtype == 'object':
-                try:
-                    display_df[col] = display_df[col].str.replace(',', '').astype(float)
-                except:
-                    # If conversion fails, at least ensure it's a string
-                    display_df[col] = display_df[col].astype(str)
-        
-        # Add derived metrics with safety checks
-        display_df['Efficiency'] = display_df.apply(
-            lambda row: f"{(row['Planned'] / row['Actual'] * 100):.1f}%" 
-            if pd.notnull(row['Actual']) and pd.notnull(row['Planned']) and row['Actual'] > 0 else "0.0%", 
-            axis=1
-        )
-        
-        if 'Overrun' not in display_df.columns:
-            display_df['Overrun'] = display_df.apply(
-                lambda row: row['Actual'] - row['Planned'] 
-                if pd.notnull(row['Actual']) and pd.notnull(row['Planned'])
-                else 0,
-                axis=1
-            )
-        
-        if 'Overrun %' not in display_df.columns:
-            display_df['Overrun %'] = display_df.apply(
-                lambda row: f"{((row['Actual'] - row['Planned']) / row['Planned'] * 100):.1f}%" 
-                if pd.notnull(row['Planned']) and row['Planned'] > 0 else "0.0%",
-                axis=1
-            )
-        
-        # Add trend indicators by comparing to previous year
-        display_df['Trend'] = ''
-        for i in range(1, len(display_df)):
-            try:
-                current = pd.to_numeric(display_df['Overrun %'].iloc[i].replace('%', ''))
-                previous = pd.to_numeric(display_df['Overrun %'].iloc[i-1].replace('%', ''))
-                
-                if current < previous:
-                    display_df.at[i, 'Trend'] = '↓ Improved'
-                elif current > previous:
-                    display_df.at[i, 'Trend'] = '↑ Declined'
-                else:
-                    display_df.at[i, 'Trend'] = '→ No Change'
-            except:
-                display_df.at[i, 'Trend'] = '→ No Data'
-        
-        # Generate insights based on the data
-        display_df['Key Insight'] = ''
-        for i in range(len(display_df)):
-            try:
-                efficiency = pd.to_numeric(display_df['Efficiency'].iloc[i].replace('%', ''))
-                overrun_pct = pd.to_numeric(display_df['Overrun %'].iloc[i].replace('%', ''))
-                
-                if efficiency > 95:
-                    display_df.at[i, 'Key Insight'] = 'Excellent performance'
-                elif efficiency > 90:
-                    display_df.at[i, 'Key Insight'] = 'Good resource utilization'
-                elif efficiency > 80:
-                    display_df.at[i, 'Key Insight'] = 'Average performance'
-                elif overrun_pct > 25:
-                    display_df.at[i, 'Key Insight'] = 'Significant overruns'
-                else:
-                    display_df.at[i, 'Key Insight'] = 'Needs improvement'
-            except:
-                display_df.at[i, 'Key Insight'] = 'Insufficient data'
-        
-        # Create clickable year links for navigation
-        if 'Year' in display_df.columns:
-            # Store original Year values before formatting for selection
-            display_df['Year_Value'] = display_df['Year']
+        # Derive the performance columns (cached on the table contents)
+        display_df = build_yearly_performance_table(display_df)
         
         # Create a more visually interesting layout
         col1, col2 = st.columns([2, 1])
@@ -1382,20 +1380,7 @@ if data:
                 year_options = display_df['Year'].tolist()
             
             # Clean up year values for display
-            clean_years = []
-            year_display_map = {}
-            
-            for year in year_options:
-                if isinstance(year, str) and '[' in year:
-                    # Extract year from "[2023](/Yearly_Analysis?year=2023)" format
-                    year_match = re.search(r'\[(.*?)\]', year)
-                    if year_match:
-                        clean_year = year_match.group(1)
-                        clean_years.append(clean_year)
-                        year_display_map[clean_year] = year
-                else:
-                    clean_years.append(str(year))
-                    year_display_map[str(year)] = year
+            clean_years = clean_year_series(tuple(year_options))
             
             # Use a selectbox for year selection
             if clean_years:
@@ -1483,36 +1468,13 @@ if data:
                 # Find the row for this year
                 year_filter = selected_year
                 
-                # Find the matching row by checking Year_Value or Year column
-                year_match_found = False
-                
-                if 'Year_Value' in display_df.columns:
-                    # Try to match based on Year_Value column
-                    for idx, row in display_df.iterrows():
-                        year_val = row['Year_Value']
-                        if isinstance(year_val, str) and '[' in year_val:
-                            # Extract year from link format
-                            match = re.search(r'\[(.*?)\]', year_val)
-                            if match and match.group(1) == str(year_filter):
-                                selected_row = display_df.iloc[[idx]]
-                                year_match_found = True
-                                break
-                
-                # If no match found yet, try with Year column
-                if not year_match_found:
-                    for idx, row in display_df.iterrows():
-                        year_val = row['Year']
-                        if isinstance(year_val, str) and '[' in year_val:
-                            # Extract year from link format
-                            match = re.search(r'\[(.*?)\]', year_val)
-                            if match and match.group(1) == str(year_filter):
-                                selected_row = display_df.iloc[[idx]]
-                                year_match_found = True
-                                break
-                        elif str(year_val) == str(year_filter):
-                            selected_row = display_df.iloc[[idx]]
-                            year_match_found = True
-                            break
+                # Find the matching row by its plain year label
+                year_col = display_df['Year_Value' if 'Year_Value' in display_df.columns else 'Year']
+                year_to_idx = dict(zip(clean_year_series(tuple(year_col)), display_df.index))
+                row_idx = year_to_idx.get(str(year_filter))
+                year_match_found = row_idx is not None
+                if year_match_found:
+                    selected_row = display_df.loc[[row_idx]]
                 
                 if year_match_found and not selected_row.empty:
                     row = selected_row.iloc[0]
@@ -1521,29 +1483,9 @@ if data:
                     st.markdown(f"#### Year {year_filter}")
                     
                     try:
-                        # Convert to numbers for comparison - with better error handling
-                        efficiency_val = 0
-                        overrun_val = 0
-                        
-                        # Safely extract efficiency value
-                        if 'Efficiency' in row and row['Efficiency'] is not None:
-                            if isinstance(row['Efficiency'], str) and '%' in row['Efficiency']:
-                                try:
-                                    efficiency_val = float(row['Efficiency'].replace('%', ''))
-                                except ValueError:
-                                    efficiency_val = 0
-                            elif isinstance(row['Efficiency'], (int, float)):
-                                efficiency_val = float(row['Efficiency'])
-                        
-                        # Safely extract overrun value
-                        if 'Overrun %' in row and row['Overrun %'] is not None:
-                            if isinstance(row['Overrun %'], str) and '%' in row['Overrun %']:
-                                try:
-                                    overrun_val = float(row['Overrun %'].replace('%', ''))
-                                except ValueError:
-                                    overrun_val = 0
-                            elif isinstance(row['Overrun %'], (int, float)):
-                                overrun_val = float(row['Overrun %'])
+                        # Read the pre-parsed numeric metrics
+                        efficiency_val = row['_eff_num']
+                        overrun_val = row['_over_pct_num']
                         
                         # Create metrics with color coding
                         col_a, col_b = st.columns(2)
@@ -1562,89 +1504,18 @@ if data:
                             )
                         
                         # Show efficiency gauge chart
-                        fig = go.Figure(go.Indicator(
-                            mode = "gauge+number",
-                            value = efficiency_val,
-                            title = {'text': "Efficiency"},
-                            domain = {'x': [0, 1], 'y': [0, 1]},
-                            gauge = {
-                                'axis': {'range': [0, 100], 'tickwidth': 1},
-                                'bar': {'color': "#00b4d8"},
-                                'steps': [
-                                    {'range': [0, 60], 'color': "#e5383b"},
-                                    {'range': [60, 80], 'color': "#ffb703"},
-                                    {'range': [80, 100], 'color': "#52b788"}
-                                ],
-                                'threshold': {
-                                    'line': {'color': "red", 'width': 4},
-                                    'thickness': 0.75,
-                                    'value': 95
-                                }
-                            }
-                        ))
-                        fig.update_layout(height=200, margin=dict(l=10, r=10, t=30, b=10))
-                        st.plotly_chart(fig, use_container_width=True)
+                        st.plotly_chart(create_efficiency_gauge(round(efficiency_val, 1)), use_container_width=True)
                         
                         # Show key metrics in a box with safer data access
                         st.markdown("#### Key Metrics")
                         
-                        # Ensure values are available and properly formatted
-                        planned_val = row.get('Planned', 0)
-                        actual_val = row.get('Actual', 0)
-                        overrun_hours = row.get('Overrun', 0)
-                        jobs_count = row.get('Jobs', 'N/A')
-                        
-                        # Convert to float if they are strings
-                        if isinstance(planned_val, str):
-                            try:
-                                planned_val = float(planned_val.replace(',', ''))
-                            except ValueError:
-                                planned_val = 0
-                        
-                        if isinstance(actual_val, str):
-                            try:
-                                actual_val = float(actual_val.replace(',', ''))
-                            except ValueError:
-                                actual_val = 0
-                            
-                        if isinstance(overrun_hours, str):
-                            try:
-                                overrun_hours = float(overrun_hours.replace(',', ''))
-                            except ValueError:
-                                overrun_hours = 0
-                        
                         # Format metrics to ensure they display properly
-                        try:
-                            planned_display = f"{float(planned_val):.1f}"
-                            actual_display = f"{float(actual_val):.1f}" 
-                            overrun_display = f"{float(overrun_hours):.1f}"
-                            jobs_display = str(jobs_count)
-                        except (ValueError, TypeError):
-                            planned_display = str(planned_val)
-                            actual_display = str(actual_val)
-                            overrun_display = str(overrun_hours)
-                            jobs_display = str(jobs_count)
+                        planned_display = f"{row['_planned_num']:.1f}"
+                        actual_display = f"{row['_actual_num']:.1f}"
+                        overrun_display = f"{row['_overrun_num']:.1f}"
+                        jobs_display = str(row.get('Jobs', 'N/A'))
                         
-                        metrics_html = f"""
-                        <div style="background-color: #f8f9fa; padding: 15px; border-radius: 5px; margin-bottom: 15px;">
-                            <div style="display: flex; justify-content: space-between; margin-bottom: 10px;">
-                                <span>Planned Hours:</span>
-                                <span><strong>{planned_display}</strong></span>
-                            </div>
-                            <div style="display: flex; justify-content: space-between; margin-bottom: 10px;">
-                                <span>Actual Hours:</span>
-                                <span><strong>{actual_display}</strong></span>
-                            </div>
-                            <div style="display: flex; justify-content: space-between; margin-bottom: 10px;">
-                                <span>Overrun Hours:</span>
-                                <span><strong>{overrun_display}</strong></span>
-                            </div>
-                            <div style="display: flex; justify-content: space-between;">
-                                <span>Jobs Completed:</span>
-                                <span><strong>{jobs_display}</strong></span>
-                            </div>
-                        </div>
-                        """
+                        metrics_html = render_year_metrics_html(planned_display, actual_display, overrun_display, jobs_display)
                         st.markdown(metrics_html, unsafe_allow_html=True)
                         
                         # Show recommendations based on efficiency
@@ -1715,11 +1586,9 @@ else:
     # Try to diagnose the error
     with st.expander("Troubleshooting"):
         st.write("Checking for Excel file...")
-        import os
         
         # List files to see if we can find the Excel file
-        files = os.listdir(".")
-        excel_files = [f for f in files if f.endswith(".xlsx")]
+        excel_files = find_excel_files(".")
         
         if excel_files:
             st.write(f"Found Excel files: {', '.join(excel_files)}")
@@ -1729,8 +1598,7 @@ else:
             
             # Check in common subdirectories
             if os.path.exists("attached_assets"):
-                asset_files = os.listdir("attached_assets")
-                excel_assets = [f for f in asset_files if f.endswith(".xlsx")]
+                excel_assets = find_excel_files("attached_assets")
                 if excel_assets:
                     st.write(f"Found Excel files in attached_assets: {', '.join(excel_assets)}")
                     st.write("Try copying WORKHISTORY.xlsx to the main directory.") 
\ No newline at end of file
@@ -2,11 +2,11 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import numpy as np
 from datetime import datetime
-from utils.formatters import format_money, format_number, format_percent
+from utils.formatters import format_money, format_number, format_percent, format_percents
 from utils.data_utils import load_year_data
+from utils.visualization import SECONDARY_Y_AXES, WORKCENTER_BAR_COLORS, create_empty_chart
 
 # Page configuration
 st.set_page_config(
@@ -154,6 +154,93 @@ def get_yearly_data(selected_year):
         st.error(f"Error loading data for year {selected_year}: {str(e)}")
         return None
 
+# Function to build the quarterly hours vs overrun cost chart
+@st.cache_data(ttl=3600, show_spinner=False)
+def create_quarterly_chart(quarterly_df):
+    if quarterly_df.empty or quarterly_df[['planned_hours', 'actual_hours', 'overrun_cost']].isnull().all().all():
+        fig = create_empty_chart("No quarterly data available")
+    else:
+        # Clean data: replace NaN with 0, ensure no negative heights
+        plot_df = quarterly_df.copy()
+        clean_cols = [col for col in ['planned_hours', 'actual_hours', 'overrun_cost'] if col in plot_df.columns]
+        plot_df[clean_cols] = np.fmax(plot_df[clean_cols].to_numpy(dtype=np.float64), 0.0)
+        # Get the quarter column name
+        quarter_col = None
+        for col in plot_df.columns:
+            if col.lower() == 'quarter':
+                quarter_col = col
+                break
+        if not quarter_col:
+            plot_df['Quarter'] = [f"Q{i+1}" for i in range(len(plot_df))]
+            quarter_col = 'Quarter'
+        # Dual-axis layout built directly instead of through make_subplots
+        fig = go.Figure(
+            data=[
+                go.Bar(x=plot_df[quarter_col], y=plot_df["planned_hours"], name="Planned Hours", marker_color="#1E88E5", xaxis="x", yaxis="y"),
+                go.Bar(x=plot_df[quarter_col], y=plot_df["actual_hours"], name="Actual Hours", marker_color="#e5383b", xaxis="x", yaxis="y"),
+                go.Scattergl(x=plot_df[quarter_col], y=plot_df["overrun_cost"], name="Overrun Cost", 
+                        mode="lines+markers", marker_color="#FFA000", line=dict(width=3), xaxis="x", yaxis="y2")
+            ],
+            layout=dict(
+                margin=dict(t=0, r=10, b=0, l=10),
+                barmode="group",
+                plot_bgcolor='rgba(0,0,0,0)',
+                paper_bgcolor='rgba(0,0,0,0)',
+                template="wh3_dashboard",
+                legend=dict(xanchor="right", x=1),
+                height=400,
+                xaxis={**SECONDARY_Y_AXES["xaxis"], "title": {"text": "Quarter"}},
+                yaxis={**SECONDARY_Y_AXES["yaxis"], "title": {"text": "Hours"}},
+                yaxis2={**SECONDARY_Y_AXES["yaxis2"], "title": {"text": "Overrun Cost ($)"}}
+            )
+        )
+    return fig
+
+# Function to build the grouped work center hours chart (one bar trace per hour column, no px wide-to-long melt)
+@st.cache_data(ttl=3600, show_spinner=False)
+def create_workcenter_hours_chart(wc_df):
+    fig = go.Figure(
+        data=[
+            go.Bar(
+                x=wc_df["work_center"],
+                y=wc_df[col],
+                name=col.replace("_hours", "").title(),
+                marker_color=color,
+                hovertemplate=f"Type={col}<br>Work Center=%{{x}}<br>Hours=%{{y}}<extra></extra>"
+            )
+            for col, color in WORKCENTER_BAR_COLORS.items()
+        ],
+        layout=dict(
+            title="Work Center Hours Breakdown",
+            barmode="group",
+            legend=dict(title_text="Type", tracegroupgap=0),
+            xaxis_title="Work Center",
+            yaxis_title="Hours"
+        )
+    )
+    return fig
+
+# Function to build the top 10 repeat NCR parts chart
+@st.cache_data(ttl=3600, show_spinner=False)
+def create_repeat_ncr_chart(repeat_df):
+    # Sort by repeat NCR hours and take top 10
+    chart_data = repeat_df.sort_values("repeat_ncr_hours", ascending=False).head(10)
+    
+    fig = px.bar(
+        chart_data,
+        x="part_name",
+        y="repeat_ncr_hours",
+        color="ncr_job_count",
+        title="Top 10 Parts with Repeat NCR Issues",
+        labels={
+            "part_name": "Part",
+            "repeat_ncr_hours": "NCR Hours",
+            "ncr_job_count": "Job Count"
+        },
+        color_continuous_scale=px.colors.sequential.Reds
+    )
+    return fig
+
 # Load yearly data with a spinner
 with st.spinner(f"Loading data for year {year}..."):
     data = get_yearly_data(year)
@@ -279,55 +366,7 @@ if data:
     
     with col2:
         st.markdown("<h3 style='font-size: 18px; margin-bottom: 15px;'>Hours vs Cost</h3>", unsafe_allow_html=True)
-        if quarterly_df.empty or quarterly_df[['planned_hours', 'actual_hours', 'overrun_cost']].isnull().all().all():
-            fig = go.Figure()
-            fig.add_annotation(
-                text="No quarterly data available",
-                showarrow=False,
-                font=dict(size=20)
-            )
-            fig.update_layout(height=400)
-        else:
-            # Clean data: replace NaN with 0, ensure no negative heights
-            plot_df = quarterly_df.copy()
-            for col in ['planned_hours', 'actual_hours', 'overrun_cost']:
-                if col in plot_df.columns:
-                    plot_df[col] = plot_df[col].fillna(0)
-                    plot_df[col] = plot_df[col].apply(lambda x: max(x, 0))
-            # Get the quarter column name
-            quarter_col = None
-            for col in plot_df.columns:
-                if col.lower() == 'quarter':
-                    quarter_col = col
-                    break
-            if not quarter_col:
-                plot_df['Quarter'] = [f"Q{i+1}" for i in range(len(plot_df))]
-                quarter_col = 'Quarter'
-            fig = make_subplots(specs=[[{"secondary_y": True}]])
-            fig.add_trace(
-                go.Bar(x=plot_df[quarter_col], y=plot_df["planned_hours"], name="Planned Hours", marker_color="#1E88E5"),
-                secondary_y=False
-            )
-            fig.add_trace(
-                go.Bar(x=plot_df[quarter_col], y=plot_df["actual_hours"], name="Actual Hours", marker_color="#e5383b"),
-                secondary_y=False
-            )
-            fig.add_trace(
-                go.Scatter(x=plot_df[quarter_col], y=plot_df["overrun_cost"], name="Overrun Cost", 
-                        mode="lines+markers", marker_color="#FFA000", line=dict(width=3)),
-                secondary_y=True
-            )
-            fig.update_layout(
-                margin=dict(t=0, r=10, b=0, l=10),
-                barmode="group",
-                xaxis_title="Quarter",
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-                height=400
-            )
-            fig.update_yaxes(title_text="Hours", secondary_y=False)
-            fig.update_yaxes(title_text="Overrun Cost ($)", secondary_y=True)
+        fig = create_quarterly_chart(quarterly_df)
         st.plotly_chart(fig, use_container_width=True)
     
     # Add summary metrics at the bottom of the quarterly analysis
@@ -500,27 +539,7 @@ if data:
             st.dataframe(display_wc, use_container_width=True, hide_index=True)
             
             # Create work center chart
-            fig = px.bar(
-                wc_df,
-                x="work_center",
-                y=["planned_hours", "actual_hours", "overrun_hours"],
-                barmode="group",
-                title="Work Center Hours Breakdown",
-                labels={
-                    "work_center": "Work Center",
-                    "value": "Hours",
-                    "variable": "Type"
-                },
-                color_discrete_map={
-                    "planned_hours": "#1e40af",
-                    "actual_hours": "#dc2626",
-                    "overrun_hours": "#f59e0b"
-                }
-            )
-            
-            # Update column names in legend
-            fig.for_each_trace(lambda t: t.update(name=t.name.replace("_hours", "").title()))
-            
+            fig = create_workcenter_hours_chart(wc_df)
             st.plotly_chart(fig, use_container_width=True)
         else:
             st.info("No work center data available for this year.")
@@ -554,23 +573,7 @@ if data:
             
             # Create chart for repeat NCRs
             if len(repeat_df) > 0:
-                # Sort by repeat NCR hours and take top 10
-                chart_data = repeat_df.sort_values("repeat_ncr_hours", ascending=False).head(10)
-                
-                fig = px.bar(
-                    chart_data,
-                    x="part_name",
-                    y="repeat_ncr_hours",
-                    color="ncr_job_count",
-                    title="Top 10 Parts with Repeat NCR Issues",
-                    labels={
-                        "part_name": "Part",
-                        "repeat_ncr_hours": "NCR Hours",
-                        "ncr_job_count": "Job Count"
-                    },
-                    color_continuous_scale=px.colors.sequential.Reds
-                )
-                
+                fig = create_repeat_ncr_chart(repeat_df)
                 st.plotly_chart(fig, use_container_width=True)
         else:
             st.info("No repeat NCR data available for this year.")
@@ -610,7 +613,7 @@ if data:
             display_job_adj["planned_hours"] = display_job_adj["planned_hours"].apply(format_number)
             display_job_adj["actual_hours"] = display_job_adj["actual_hours"].apply(format_number)
             display_job_adj["suggested_hours"] = display_job_adj["suggested_hours"].apply(format_number)
-            display_job_adj["adjustment_percent"] = display_job_adj["adjustment_percent"].apply(lambda x: format_percent(x/100))
+            display_job_adj["adjustment_percent"] = format_percents(display_job_adj["adjustment_percent"] / 100)
             
             # Rename columns
             display_job_adj = display_job_adj.rename(columns={
@@ -634,7 +637,7 @@ if data:
                 display_part_adj["avg_planned_hours"] = display_part_adj["avg_planned_hours"].apply(format_number)
                 display_part_adj["avg_actual_hours"] = display_part_adj["avg_actual_hours"].apply(format_number)
                 display_part_adj["suggested_hours"] = display_part_adj["suggested_hours"].apply(format_number)
-                display_part_adj["adjustment_percent"] = display_part_adj["adjustment_percent"].apply(lambda x: format_percent(x/100))
+                display_part_adj["adjustment_percent"] = format_percents(display_part_adj["adjustment_percent"] / 100)
                 
                 # Rename columns
                 display_part_adj = display_part_adj.rename(columns={
@@ -1,9 +1,11 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-from utils.formatters import format_money, format_number, format_percent
+from utils.formatters import format_money, format_number, format_percent, format_percents
 from utils.data_utils import load_metric_data
+from utils.visualization import create_empty_chart
 
 # Page configuration
 st.set_page_config(
@@ -106,17 +108,9 @@ if data:
         # Check if yearly_df is empty or missing expected columns
         if yearly_df.empty:
             # Create an empty figure with a message
-            fig = go.Figure()
-            fig.add_annotation(
-                text="No yearly data available",
-                showarrow=False,
-                font=dict(size=20)
-            )
+            fig = create_empty_chart("No yearly data available")
         else:
             
-            # Create a manual figure instead of using px.line which can be more error-prone
-            fig = go.Figure()
-            
             # Make sure required columns exist
             if "year" not in yearly_df.columns:
                 # Create a year column with incremental years
@@ -130,23 +124,24 @@ if data:
                 # Create a placeholder column if needed
                 yearly_df[y_column] = [0] * len(yearly_df)
             
-            # Add the scatter trace manually
-            fig.add_trace(
-                go.Scatter(
-                    x=yearly_df["year"].tolist(),
-                    y=yearly_df[y_column].tolist(),
-                    mode="lines+markers",
-                    name=METRICS[selected_metric],
-                    line=dict(width=3)
+            # Create a manual figure instead of using px.line which can be more error-prone,
+            # passing the trace and titles in one constructor call
+            fig = go.Figure(
+                data=[
+                    go.Scattergl(
+                        x=yearly_df["year"].tolist(),
+                        y=yearly_df[y_column].tolist(),
+                        mode="lines+markers",
+                        name=METRICS[selected_metric],
+                        line=dict(width=3)
+                    )
+                ],
+                layout=dict(
+                    title=f"{METRICS[selected_metric]} by Year",
+                    xaxis_title="Year",
+                    yaxis_title=y_title
                 )
             )
-            
-            # Set the title and axis labels
-            fig.update_layout(
-                title=f"{METRICS[selected_metric]} by Year",
-                xaxis_title="Year",
-                yaxis_title=y_title
-            )
         
         fig.update_traces(line=dict(width=3), hovertemplate=hovertemplate)
         
@@ -243,7 +238,7 @@ if data:
                 
             display_customer = display_customer.rename(columns=rename_dict)
             
-            display_customer["% of Total"] = display_customer["% of Total"].apply(lambda x: format_percent(x/100))
+            display_customer["% of Total"] = format_percents(display_customer["% of Total"] / 100)
             
             st.dataframe(
                 display_customer.sort_values("Value", ascending=False),
@@ -289,7 +284,7 @@ if data:
                 "percent_of_total": "% of Total"
             })
             
-            display_wc["% of Total"] = display_wc["% of Total"].apply(lambda x: format_percent(x/100))
+            display_wc["% of Total"] = format_percents(display_wc["% of Total"] / 100)
             
             st.dataframe(
                 display_wc.sort_values("Value", ascending=False),
@@ -315,6 +310,7 @@ if data:
                 x="month",
                 y="value",
                 markers=True,
+                render_mode="webgl",
                 title=f"{METRICS[selected_metric]} by Month (Average Across Years)",
                 labels={
                     "month": "Month",
@@ -378,7 +374,7 @@ if data:
         numeric_corr = display_corr["correlation"].copy()
         
         # Format correlation as string with 3 decimal places
-        display_corr["correlation"] = display_corr["correlation"].apply(lambda x: f"{x:.3f}")
+        display_corr["correlation"] = np.char.mod("%.3f", display_corr["correlation"].to_numpy(dtype=float))
         
         display_corr = display_corr.rename(columns={
             "metric": "Metric",
@@ -16,6 +16,8 @@ NCR_CATEGORIES = {
     'REPAIR': 'repair',
     'OTHER': 'other'
 }
+# Low-cardinality label columns repeated on every job row
+LABEL_COLUMNS = ['customer_name', 'work_center']
 
 def generate_customer_data(customers, total_value):
     """Helper function to generate customer data with list_name support"""
@@ -39,6 +41,13 @@ def generate_customer_data(customers, total_value):
     
     return customer_data
 
+def categorize_label_columns(df):
+    """Store repeated label columns as categoricals so equality filters compare integer codes."""
+    for col in LABEL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    return df
+
 def load_excel_data():
     """Load data from the Excel file."""
     # First check if we have uploaded data in session state
@@ -50,7 +59,7 @@ def load_excel_data():
         if 'operation_finish_date' in df.columns:
             df['operation_finish_date'] = pd.to_datetime(df['operation_finish_date'], errors='coerce')
         
-        return df
+        return categorize_label_columns(df)
     
     # If no session state data, try loading from file
     possible_paths = [
@@ -134,7 +143,7 @@ def load_excel_data():
                     df['year'] = pd.DatetimeIndex(df['operation_finish_date']).year
                 
                 print(f"Successfully loaded Excel data with {len(df)} records")
-                return df
+                return categorize_label_columns(df)
             except Exception as e:
                 print(f"Error processing Excel file {file_path}: {str(e)}")
                 import traceback
@@ -1188,8 +1197,10 @@ def load_metric_data(metric):
         elif metric == "overrun_percent":
             # Jobs with highest overrun percentage
             if 'planned_hours' in df.columns and 'actual_hours' in df.columns:
-                df['overrun_pct'] = (df['actual_hours'] - df['planned_hours']) / df['planned_hours'] * 100
-                df['overrun_pct'] = df['overrun_pct'].replace([np.inf, -np.inf], np.nan).fillna(0)
+                planned = df['planned_hours'].to_numpy(dtype=float)
+                overrun = df['actual_hours'].to_numpy(dtype=float) - planned
+                # Zero planned hours or missing values leave the percentage at 0 (no inf/NaN intermediates)
+                df['overrun_pct'] = np.divide(overrun, planned, out=np.zeros(len(df)), where=(planned != 0) & ~np.isnan(overrun)) * 100
                 sorted_jobs = df.sort_values('overrun_pct', ascending=False)
                 related_jobs = sorted_jobs.head(20).to_dict('records')
                 
@@ -1,3 +1,8 @@
+import numpy as np
+
+# printf-style percentage format shared by the scalar and array formatters
+PERCENT_FORMAT = "%.1f%%"
+
 def format_money(value):
     """Format a value as currency."""
     return f"${value:,.0f}"
@@ -8,4 +13,8 @@ def format_number(value, digits=1):
 
 def format_percent(value):
     """Format a value as a percentage."""
-    return f"{value:.1f}%"
+    return PERCENT_FORMAT % value
+
+def format_percents(values):
+    """Format an array of values as percentages in one vectorized pass."""
+    return np.char.mod(PERCENT_FORMAT, np.asarray(values, dtype=float))
@@ -1,23 +1,150 @@
-import plotly.express as px
+import streamlit as st
+from functools import lru_cache, wraps
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+import plotly.io as pio
 import pandas as pd
+import numpy as np
 
+__all__ = [
+    'create_yearly_trends_chart',
+    'create_customer_profit_chart',
+    'create_workcenter_chart',
+    'create_simplified_customer_chart',
+    'create_workcenter_roi_chart',
+    'create_empty_chart',
+    'm4_reduce'
+]
+
+# Chart template: the active default look plus the legend every dashboard chart shares, registered once at import.
+# Height stays in each figure's own layout: st.plotly_chart sizes the element from layout.height alone
+pio.templates["wh3_dashboard"] = go.layout.Template(pio.templates[pio.templates.default])
+pio.templates["wh3_dashboard"].layout.update(legend=dict(orientation="h", yanchor="bottom", y=1.02))
+
+# Plain-dict copy for figures built with _validate=False, which don't resolve template names
+CHART_TEMPLATE = pio.templates["wh3_dashboard"].to_plotly_json()
+
+# Axis layout produced by make_subplots(specs=[[{"secondary_y": True}]]), spelled out as plain dicts
+SECONDARY_Y_AXES = {
+    "xaxis": {"anchor": "y", "domain": [0.0, 0.94]},
+    "yaxis": {"anchor": "x", "domain": [0.0, 1.0]},
+    "yaxis2": {"anchor": "x", "overlaying": "y", "side": "right"}
+}
+
+# Horizontal pixel buckets used when down-sampling line series, and the most bars drawn in the work center charts
+M4_WIDTH = 1000
+MAX_WORKCENTER_BARS = 50
+
+# Bar colours indexed by how many thresholds a value clears (efficiency: 85/100, overrun: 0/15)
+EFFICIENCY_BAR_PALETTE = np.array(['#dc2626', '#f97316', '#22c55e'])
+OVERRUN_BAR_PALETTE = np.array(['#22c55e', '#f97316', '#dc2626'])
+
+# Customer columns that are always numeric, typed as float64 when the frame is built
+CUSTOMER_NUMERIC_COLUMNS = ['planned_hours', 'actual_hours', 'overrun_hours', 'profitability', 'efficiency']
+
+# Bar colour per hour column in the work center chart
+WORKCENTER_BAR_COLORS = {
+    "planned_hours": "#1e40af",
+    "actual_hours": "#dc2626",
+    "overrun_hours": "#f59e0b"
+}
+
+# Columns each chart needs before it will draw anything (checked with issubset against the frame's columns)
+YEARLY_REQUIRED_COLUMNS = frozenset(["year", "planned_hours", "actual_hours", "overrun_hours"])
+CUSTOMER_PROFIT_REQUIRED_COLUMNS = frozenset(["profitability", "actual_hours", "overrun_hours"])
+WORKCENTER_REQUIRED_COLUMNS = frozenset(["work_center", "planned_hours", "actual_hours", "overrun_hours"])
+
+def cache_figure_spec(builder):
+    """Cache a chart builder's figure as a plain dict spec and hand callers a fresh unvalidated Figure around it."""
+    # wraps() gives each cached spec function the builder's name and source, which Streamlit keys the cache on
+    @st.cache_data(ttl=3600, show_spinner=False)
+    @wraps(builder)
+    def build_spec(*args, **kwargs):
+        return builder(*args, **kwargs).to_plotly_json()
+    
+    @wraps(builder)
+    def wrapper(*args, **kwargs):
+        return go.Figure(build_spec(*args, **kwargs), _validate=False)
+    return wrapper
+
+@lru_cache(maxsize=16)
+def _empty_figure_spec(message):
+    """Return the plain figure dict for a blank chart carrying a single centred message."""
+    return {
+        "data": [],
+        "layout": {
+            "template": CHART_TEMPLATE,
+            "height": 400,
+            "annotations": [{"text": message, "showarrow": False, "font": {"size": 20}}]
+        }
+    }
+
+def create_empty_chart(message):
+    """Return a blank chart carrying a single centred message, built from the cached spec."""
+    # Figure copies the spec on construction, so callers can't mutate the cached dict
+    return go.Figure(_empty_figure_spec(message), _validate=False)
+
+def _customer_frame(customer_data):
+    """Build a working customer DataFrame from records (or a shallow copy of a frame) with float64 numeric columns."""
+    if isinstance(customer_data, pd.DataFrame):
+        # Shallow copy: column assignments below replace arrays rather than writing into the caller's buffers
+        df = customer_data.copy(deep=False)
+    else:
+        df = pd.DataFrame.from_records(customer_data if customer_data is not None else [])
+    numeric_cols = [col for col in CUSTOMER_NUMERIC_COLUMNS if col in df.columns]
+    df[numeric_cols] = df[numeric_cols].astype('float64')
+    return df
+
+def _scatter(secondary_y=False, **kwargs):
+    """Return a WebGL scatter trace as a plain dict, bound to the primary or secondary y-axis."""
+    return dict(type="scattergl", xaxis="x", yaxis="y2" if secondary_y else "y", **kwargs)
+
+def _bar(secondary_y=False, **kwargs):
+    """Return a bar trace as a plain dict, bound to the primary or secondary y-axis."""
+    return dict(type="bar", xaxis="x", yaxis="y2" if secondary_y else "y", **kwargs)
+
+def _secondary_y_figure(traces, xaxis=None, yaxis=None, yaxis2=None, **layout):
+    """Build a dual y-axis figure from plain trace/layout dicts without make_subplots or property validation."""
+    layout["template"] = CHART_TEMPLATE
+    layout["xaxis"] = {**SECONDARY_Y_AXES["xaxis"], **(xaxis or {})}
+    layout["yaxis"] = {**SECONDARY_Y_AXES["yaxis"], **(yaxis or {})}
+    layout["yaxis2"] = {**SECONDARY_Y_AXES["yaxis2"], **(yaxis2 or {})}
+    return go.Figure(data=traces, layout=layout, _validate=False)
+
+def m4_reduce(df, x_col, y_cols, width=M4_WIDTH):
+    """Keep only the first, last, min and max row of each y column per x pixel bucket (M4 aggregation)."""
+    if len(df) <= 4 * width:
+        return df
+    
+    x = df[x_col].to_numpy(dtype=float)
+    x_span = x.max() - x.min()
+    if x_span > 0:
+        buckets = np.minimum(((x - x.min()) / x_span * width).astype(int), width - 1)
+    else:
+        buckets = np.zeros(len(df), dtype=int)
+    
+    # Positional row numbers of the rows worth drawing in each bucket
+    positions = pd.Series(np.arange(len(df))).groupby(buckets)
+    keep = [positions.first().to_numpy(), positions.last().to_numpy()]
+    for col in y_cols:
+        values = pd.Series(df[col].to_numpy(dtype=float)).groupby(buckets)
+        keep += [values.idxmin().to_numpy(), values.idxmax().to_numpy()]
+    
+    rows = np.unique(np.concatenate(keep))
+    return df.iloc[rows].sort_values(x_col)
+
+@cache_figure_spec
 def create_yearly_trends_chart(yearly_df):
     """Create yearly trends chart with hours and overrun cost with styling like the image."""
     # Handle empty or invalid data
-    if yearly_df is None or yearly_df.empty or not all(col in yearly_df.columns for col in ["year", "planned_hours", "actual_hours"]):
-        fig = go.Figure()
-        fig.add_annotation(text="No yearly data available", showarrow=False, font=dict(size=20))
-        fig.update_layout(height=400)
-        return fig
+    if yearly_df is None or yearly_df.empty or not YEARLY_REQUIRED_COLUMNS.issubset(yearly_df.columns):
+        return create_empty_chart("No yearly data available")
     
     # Clean data
-    plot_df = yearly_df.copy()
-    for col in ["planned_hours", "actual_hours", "overrun_hours"]:
-        if col in plot_df.columns:
-            plot_df[col] = plot_df[col].fillna(0)
-            plot_df[col] = plot_df[col].apply(lambda x: max(x, 0))
+    hour_cols = ["planned_hours", "actual_hours", "overrun_hours"]
+    # fmax treats NaN as missing, so one ufunc pass both fills NaNs with 0 and clips negatives
+    hours = np.fmax(yearly_df[hour_cols].to_numpy(dtype=np.float64), 0.0)
+    plot_df = pd.DataFrame(hours, index=yearly_df.index, columns=hour_cols)
+    plot_df.insert(0, "year", yearly_df["year"])
     
     # Calculate overrun cost (overrun_hours * burden_rate)
     # Using a standard burden rate of $199/hour if not available
@@ -27,42 +154,54 @@ def create_yearly_trends_chart(yearly_df):
     # Sort by year to ensure chronological order
     plot_df = plot_df.sort_values("year")
     
-    # Create figure with secondary y-axis
-    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    # Down-sample long series to what the canvas can actually show
+    plot_df = m4_reduce(plot_df, "year", ["planned_hours", "actual_hours", "overrun_cost"])
+    
+    # The x-axis stays linear; plot_df is sorted by year, so its distinct years are the tick values in order
+    years = plot_df["year"]
+    year_ticks = years.dropna().unique().tolist()
+    
+    # Set y-axes ranges (one min/max pass over the plotted columns; all NaNs were filled above)
+    values = plot_df[["planned_hours", "actual_hours", "overrun_cost"]].to_numpy(dtype=float)
+    col_min, col_max = values.min(axis=0), values.max(axis=0)
+    
+    # Hour traces get float32 columns (Fortran order keeps each one contiguous), halving their base64
+    # payload; the dollar costs stay float64 so the figure data carries exact cents
+    planned, actual = values[:, :2].astype(np.float32, order="F").T
+    overrun_cost = values[:, 2]
+    max_hours = max(col_max[0], col_max[1])
+    y_max = max_hours * 1.2  # Add 20% headroom
+    
+    # Set cost axis range
+    min_cost, max_cost = col_min[2], col_max[2]
+    cost_range = max(abs(max_cost), abs(min_cost)) * 1.2  # 20% padding
     
-    # Add traces for planned hours (blue area)
-    fig.add_trace(
-        go.Scatter(
-            x=plot_df["year"],
-            y=plot_df["planned_hours"],
+    traces = [
+        # Planned hours (blue area)
+        _scatter(
+            x=years,
+            y=planned,
             name="Planned Hours",
             line=dict(color="#3b82f6", width=2),
             mode="lines",
             fill="tozeroy",
             fillcolor="rgba(59, 130, 246, 0.3)",
         ),
-        secondary_y=False
-    )
-    
-    # Add trace for actual hours (red area)
-    fig.add_trace(
-        go.Scatter(
-            x=plot_df["year"],
-            y=plot_df["actual_hours"],
+        # Actual hours (red area)
+        _scatter(
+            x=years,
+            y=actual,
             name="Actual Hours",
             line=dict(color="#ef4444", width=2),
             mode="lines",
             fill="tozeroy",
             fillcolor="rgba(239, 68, 68, 0.3)",
         ),
-        secondary_y=False
-    )
-    
-    # Add trace for overrun cost (orange line with markers)
-    fig.add_trace(
-        go.Scatter(
-            x=plot_df["year"],
-            y=plot_df["overrun_cost"],
+        # Overrun cost (orange line with markers)
+        _scatter(
+            secondary_y=True,
+            x=years,
+            y=overrun_cost,
             name="Overrun Cost",
             line=dict(color="#f59e0b", width=3),
             mode="lines+markers",
@@ -75,147 +214,121 @@ def create_yearly_trends_chart(yearly_df):
                 ),
                 symbol="circle"
             )
-        ),
-        secondary_y=True
-    )
+        )
+    ]
     
-    # Update layout
-    fig.update_layout(
-        title_text=None,
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=1.02,
-            xanchor="center",
-            x=0.5
-        ),
+    # Create figure with secondary y-axis
+    fig = _secondary_y_figure(
+        traces,
+        legend=dict(xanchor="center", x=0.5),
         height=300,
         plot_bgcolor="white",
         margin=dict(l=20, r=20, t=20, b=20),
-        hovermode="x unified"
-    )
-    
-    # Set y-axes titles
-    max_hours = max(plot_df["planned_hours"].max(), plot_df["actual_hours"].max())
-    y_max = max_hours * 1.2  # Add 20% headroom
-    
-    fig.update_yaxes(
-        title_text="Hours",
-        secondary_y=False,
-        range=[0, y_max],
-        gridcolor="rgba(107, 114, 128, 0.1)"
-    )
-    
-    # Set cost axis range
-    max_cost = plot_df["overrun_cost"].max()
-    min_cost = plot_df["overrun_cost"].min()
-    cost_range = max(abs(max_cost), abs(min_cost)) * 1.2  # 20% padding
-    
-    fig.update_yaxes(
-        title_text="Cost ($)",
-        secondary_y=True,
-        tickprefix="$",
-        range=[-cost_range if min_cost < 0 else 0, cost_range]
-    )
-    
-    fig.update_xaxes(
-        showgrid=False,
-        tickmode='array',
-        tickvals=plot_df["year"].tolist()
+        hovermode="x unified",
+        xaxis=dict(
+            showgrid=False,
+            tickmode="array",
+            tickvals=year_ticks
+        ),
+        yaxis=dict(
+            title=dict(text="Hours"),
+            range=[0, y_max],
+            gridcolor="rgba(107, 114, 128, 0.1)"
+        ),
+        yaxis2=dict(
+            title=dict(text="Cost ($)"),
+            tickprefix="$",
+            range=[-cost_range if min_cost < 0 else 0, cost_range]
+        )
     )
     
     return fig
 
+@cache_figure_spec
 def create_customer_profit_chart(customer_data):
     """Create customer profit chart."""
-    df = pd.DataFrame(customer_data)
-    if df.empty or not all(col in df.columns for col in ["profitability", "actual_hours", "overrun_hours"]):
-        fig = go.Figure()
-        fig.add_annotation(text="No customer data available", showarrow=False, font=dict(size=20))
-        fig.update_layout(height=400)
-        return fig
-    df = df.sort_values("profitability")
+    df = _customer_frame(customer_data)
+    if df.empty or not CUSTOMER_PROFIT_REQUIRED_COLUMNS.issubset(df.columns):
+        return create_empty_chart("No customer data available")
+    x_column = "list_name" if "list_name" in df.columns else "customer"
+    
+    # Slice the plotted columns before sorting so unused columns aren't reordered
+    df = df[[x_column, "profitability", "actual_hours", "overrun_hours"]].sort_values("profitability")
     for col in ["profitability", "actual_hours", "overrun_hours"]:
         df[col] = df[col].fillna(0)
-    x_column = "list_name" if "list_name" in df.columns else "customer"
-    fig = make_subplots(specs=[[{"secondary_y": True}]])
-    fig.add_trace(
-        go.Bar(
+    traces = [
+        _bar(
             x=df[x_column],
             y=df["profitability"],
             name="Profit Margin %",
-            marker_color=["#dc2626" if x < 0 else "#22c55e" for x in df["profitability"]]
+            marker=dict(color=np.where(df["profitability"].to_numpy() < 0, "#dc2626", "#22c55e").tolist())
         ),
-        secondary_y=False
-    )
-    fig.add_trace(
-        go.Scatter(
+        _scatter(
+            secondary_y=True,
             x=df[x_column],
             y=df["actual_hours"],
             name="Actual Hours",
             mode="lines+markers",
-            marker_color="#1e40af",
+            marker=dict(color="#1e40af"),
             line=dict(width=3)
         ),
-        secondary_y=True
-    )
-    fig.add_trace(
-        go.Scatter(
+        _scatter(
+            secondary_y=True,
             x=df[x_column],
             y=df["overrun_hours"],
             name="Overrun Hours",
             mode="lines+markers",
-            marker_color="#f59e0b",
+            marker=dict(color="#f59e0b"),
             line=dict(width=3)
-        ),
-        secondary_y=True
-    )
-    fig.update_layout(
-        title_text="Customer Profitability Analysis",
-        xaxis_title="Customer",
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-        height=400
+        )
+    ]
+    fig = _secondary_y_figure(
+        traces,
+        title=dict(text="Customer Profitability Analysis"),
+        legend=dict(xanchor="right", x=1),
+        height=400,
+        xaxis=dict(title=dict(text="Customer")),
+        yaxis=dict(title=dict(text="Profit Margin %"), ticksuffix="%"),
+        yaxis2=dict(title=dict(text="Hours"))
     )
-    fig.update_yaxes(title_text="Profit Margin %", secondary_y=False, ticksuffix="%")
-    fig.update_yaxes(title_text="Hours", secondary_y=True)
     return fig
 
+@cache_figure_spec
 def create_workcenter_chart(workcenter_df):
     """Create work center comparison chart."""
-    if workcenter_df is None or workcenter_df.empty or not all(col in workcenter_df.columns for col in ["work_center", "planned_hours", "actual_hours", "overrun_hours"]):
-        fig = go.Figure()
-        fig.add_annotation(text="No work center data available", showarrow=False, font=dict(size=20))
-        fig.update_layout(height=400)
-        return fig
-    df = workcenter_df.sort_values("actual_hours", ascending=False)
-    for col in ["planned_hours", "actual_hours", "overrun_hours"]:
-        df[col] = df[col].fillna(0)
-        df[col] = df[col].apply(lambda x: max(x, 0))
-    fig = px.bar(
-        df,
-        x="work_center",
-        y=["planned_hours", "actual_hours", "overrun_hours"],
-        title="Work Center Hours Breakdown",
-        barmode="group",
-        labels={
-            "value": "Hours",
-            "variable": "Category",
-            "work_center": "Work Center"
-        },
-        color_discrete_map={
-            "planned_hours": "#1e40af",
-            "actual_hours": "#dc2626",
-            "overrun_hours": "#f59e0b"
-        }
-    )
-    fig.update_layout(
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-        xaxis_tickangle=-45,
-        height=400
+    if workcenter_df is None or workcenter_df.empty or not WORKCENTER_REQUIRED_COLUMNS.issubset(workcenter_df.columns):
+        return create_empty_chart("No work center data available")
+    hour_cols = ["planned_hours", "actual_hours", "overrun_hours"]
+    # Largest actual hours first (NaNs last): argsort that one column and take the plotted arrays, no frame reindex
+    order = np.argsort(-workcenter_df["actual_hours"].to_numpy(dtype=np.float64), kind="stable")[:MAX_WORKCENTER_BARS]
+    work_centers = workcenter_df["work_center"].to_numpy()[order]
+    hours = np.fmax(workcenter_df[hour_cols].to_numpy(dtype=np.float64)[order], 0.0).astype(np.float32, order="F")
+    traces = [
+        _bar(
+            x=work_centers,
+            y=hours[:, i],
+            name=col.replace("_hours", "").title(),
+            marker=dict(color=color),
+            hovertemplate=f"Category={col}<br>Work Center=%{{x}}<br>Hours=%{{y}}<extra></extra>"
+        )
+        for i, (col, color) in enumerate(WORKCENTER_BAR_COLORS.items())
+    ]
+    fig = go.Figure(
+        data=traces,
+        layout=dict(
+            title=dict(text="Work Center Hours Breakdown"),
+            barmode="group",
+            height=400,
+            template=CHART_TEMPLATE,
+            legend=dict(title=dict(text="Category"), xanchor="right", x=1),
+            xaxis=dict(title=dict(text="Work Center"), tickangle=-45),
+            yaxis=dict(title=dict(text="Hours"))
+        ),
+        _validate=False
     )
-    fig.for_each_trace(lambda t: t.update(name=t.name.replace("_hours", "").title()))
     return fig
 
+@cache_figure_spec
 def create_simplified_customer_chart(customer_data, year_filter="All Years", sort_by="efficiency", max_customers=8):
     """
     Create a simpler, more readable customer profitability chart
@@ -230,17 +343,11 @@ def create_simplified_customer_chart(customer_data, year_filter="All Years", sor
         A plotly figure object
     """
     # Handle empty data
-    if not customer_data or len(customer_data) == 0:
-        fig = go.Figure()
-        fig.add_annotation(text="No customer data available", showarrow=False, font=dict(size=20))
-        fig.update_layout(height=400)
-        return fig
+    if customer_data is None or len(customer_data) == 0:
+        return create_empty_chart("No customer data available")
     
     # Convert to DataFrame if it's a list
-    if isinstance(customer_data, list):
-        df = pd.DataFrame(customer_data)
-    else:
-        df = customer_data.copy()
+    df = _customer_frame(customer_data)
     
     # Apply year filter if applicable
     if year_filter != "All Years":
@@ -251,24 +358,25 @@ def create_simplified_customer_chart(customer_data, year_filter="All Years", sor
     
     # If after filtering we have no data, return empty chart
     if df.empty:
-        fig = go.Figure()
-        fig.add_annotation(text=f"No customer data available for {year_filter}", showarrow=False, font=dict(size=20))
-        fig.update_layout(height=400)
-        return fig
+        return create_empty_chart(f"No customer data available for {year_filter}")
     
     # Calculate efficiency if not present
     if 'efficiency' not in df.columns and 'planned_hours' in df.columns and 'actual_hours' in df.columns:
-        df['efficiency'] = df.apply(
-            lambda x: x['planned_hours'] / x['actual_hours'] * 100 if x['actual_hours'] > 0 else 100, 
-            axis=1
-        )
+        ph = df['planned_hours'].to_numpy(dtype=float)
+        ah = df['actual_hours'].to_numpy(dtype=float)
+        df['efficiency'] = np.divide(ph, ah, out=np.ones(len(df)), where=ah > 0) * 100
     
     # Calculate profitability if not present
     if 'profitability' not in df.columns and 'planned_hours' in df.columns and 'actual_hours' in df.columns:
-        df['profitability'] = df.apply(
-            lambda x: (x['planned_hours'] - x['actual_hours']) / x['planned_hours'] * 100 if x['planned_hours'] > 0 else 0,
-            axis=1
-        )
+        ph = df['planned_hours'].to_numpy(dtype=float)
+        ah = df['actual_hours'].to_numpy(dtype=float)
+        df['profitability'] = np.divide(ph - ah, ph, out=np.zeros(len(df)), where=ph > 0) * 100
+    
+    # Get customer name column
+    customer_col = 'list_name' if 'list_name' in df.columns else 'customer'
+    
+    # Keep only the name, sort and plotted columns before sorting
+    df = df[[col for col in [customer_col, 'efficiency', 'profitability', 'planned_hours', 'actual_hours'] if col in df.columns]]
     
     # Sort data based on selected column
     if sort_by == 'efficiency' and 'efficiency' in df.columns:
@@ -282,92 +390,82 @@ def create_simplified_customer_chart(customer_data, year_filter="All Years", sor
     if len(df) > max_customers:
         df = df.iloc[:max_customers]
     
-    # Get customer name column
-    customer_col = 'list_name' if 'list_name' in df.columns else 'customer'
-    
-    # Create figure with two y-axes
-    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    traces = []
     
     # Add bars for efficiency
     if 'efficiency' in df.columns:
-        bar_colors = df['efficiency'].apply(
-            lambda x: '#22c55e' if x >= 100 else ('#f97316' if x >= 85 else '#dc2626')
-        ).tolist()
+        eff = df['efficiency'].to_numpy(dtype=float)
+        bar_colors = EFFICIENCY_BAR_PALETTE[(eff >= 85).astype(int) + (eff >= 100)].tolist()
         
-        fig.add_trace(
-            go.Bar(
+        traces.append(
+            _bar(
                 x=df[customer_col],
                 y=df['efficiency'],
                 name="Efficiency %",
-                marker_color=bar_colors,
+                marker=dict(color=bar_colors),
                 opacity=0.8,
-                text=df['efficiency'].apply(lambda x: f"{x:.1f}%"),
+                text=np.char.mod('%.1f%%', eff).tolist(),
                 textposition="auto"
-            ),
-            secondary_y=False
+            )
         )
     
     # Add line for planned hours
     if 'planned_hours' in df.columns:
-        fig.add_trace(
-            go.Scatter(
+        traces.append(
+            _scatter(
+                secondary_y=True,
                 x=df[customer_col],
                 y=df['planned_hours'],
                 name="Planned Hours",
                 mode="markers+lines",
                 marker=dict(size=10, color="#1e40af"),
                 line=dict(width=3, color="#1e40af")
-            ),
-            secondary_y=True
+            )
         )
     
     # Add line for actual hours
     if 'actual_hours' in df.columns:
-        fig.add_trace(
-            go.Scatter(
+        traces.append(
+            _scatter(
+                secondary_y=True,
                 x=df[customer_col],
                 y=df['actual_hours'],
                 name="Actual Hours",
                 mode="markers+lines",
                 marker=dict(size=10, color="#ef4444"),
                 line=dict(width=3, color="#ef4444", dash="dot")
-            ),
-            secondary_y=True
+            )
         )
     
-    # Update layout
-    fig.update_layout(
-        title=f"Customer Efficiency & Hours {'' if year_filter == 'All Years' else '- ' + year_filter}",
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5),
+    # Create figure with two y-axes
+    fig = _secondary_y_figure(
+        traces,
+        title=dict(text=f"Customer Efficiency & Hours {'' if year_filter == 'All Years' else '- ' + year_filter}"),
+        legend=dict(xanchor="center", x=0.5),
         height=400,
         plot_bgcolor="white",
         margin=dict(l=20, r=20, t=50, b=100),
-        hovermode="x unified"
-    )
-    
-    # Update axes
-    fig.update_xaxes(
-        title="Customer",
-        tickangle=-45,
-        tickfont=dict(size=11)
-    )
-    
-    fig.update_yaxes(
-        title="Efficiency %",
-        ticksuffix="%",
-        range=[0, max(df['efficiency'].max() * 1.1, 110) if 'efficiency' in df.columns else 110],
-        secondary_y=False,
-        gridcolor="rgba(107, 114, 128, 0.1)"
-    )
-    
-    fig.update_yaxes(
-        title="Hours",
-        range=[0, df['actual_hours'].max() * 1.2 if 'actual_hours' in df.columns else 100],
-        secondary_y=True
+        hovermode="x unified",
+        xaxis=dict(
+            title=dict(text="Customer"),
+            tickangle=-45,
+            tickfont=dict(size=11)
+        ),
+        yaxis=dict(
+            title=dict(text="Efficiency %"),
+            ticksuffix="%",
+            range=[0, max(df['efficiency'].max() * 1.1, 110) if 'efficiency' in df.columns else 110],
+            gridcolor="rgba(107, 114, 128, 0.1)"
+        ),
+        yaxis2=dict(
+            title=dict(text="Hours"),
+            range=[0, df['actual_hours'].max() * 1.2 if 'actual_hours' in df.columns else 100]
+        )
     )
     
     return fig
 
+@cache_figure_spec
 def create_workcenter_roi_chart(workcenter_df, sort_by="overrun_percent"):
     """
     Create an ROI analysis chart for work centers
@@ -380,33 +478,21 @@ def create_workcenter_roi_chart(workcenter_df, sort_by="overrun_percent"):
         A plotly figure object
     """
     if workcenter_df is None or workcenter_df.empty:
-        fig = go.Figure()
-        fig.add_annotation(text="No work center data available", showarrow=False, font=dict(size=20))
-        fig.update_layout(height=400)
-        return fig
-    
-    # Create a copy for data manipulation
-    df = workcenter_df.copy()
+        return create_empty_chart("No work center data available")
     
-    # Fill NaN values
-    for col in df.columns:
-        if df[col].dtype.kind in 'ifc':  # If column is numeric
-            df[col] = df[col].fillna(0)
+    # Fill NaN values in numeric columns (fillna returns the working copy)
+    df = workcenter_df.fillna({col: 0 for col in workcenter_df.columns if workcenter_df[col].dtype.kind in 'ifc'})
     
     # Calculate ROI metrics
     if all(col in df.columns for col in ["planned_hours", "actual_hours"]):
+        ph = df['planned_hours'].to_numpy(dtype=float)
+        ah = df['actual_hours'].to_numpy(dtype=float)
+        
         # Calculate overrun percentage
-        df['overrun_percent'] = df.apply(
-            lambda x: ((x['actual_hours'] - x['planned_hours']) / x['planned_hours'] * 100) 
-            if x['planned_hours'] > 0 else 0,
-            axis=1
-        )
+        df['overrun_percent'] = np.divide(ah - ph, ph, out=np.zeros(len(df)), where=ph > 0) * 100
         
         # Calculate efficiency
-        df['efficiency'] = df.apply(
-            lambda x: (x['planned_hours'] / x['actual_hours'] * 100) if x['actual_hours'] > 0 else 100,
-            axis=1
-        )
+        df['efficiency'] = np.divide(ph, ah, out=np.ones(len(df)), where=ah > 0) * 100
     
     # Add utilization if it doesn't exist
     if 'utilization' not in df.columns and 'actual_hours' in df.columns:
@@ -414,6 +500,9 @@ def create_workcenter_roi_chart(workcenter_df, sort_by="overrun_percent"):
         total_hours = df['actual_hours'].sum()
         df['utilization'] = df['actual_hours'] / total_hours * 100
     
+    # Keep only the plotted and sort columns before sorting
+    df = df[[col for col in ['work_center', 'overrun_percent', 'utilization', 'actual_hours'] if col in df.columns]]
+    
     # Sort based on selected metric
     if sort_by == "overrun_percent" and 'overrun_percent' in df.columns:
         df = df.sort_values('overrun_percent', ascending=False)
@@ -422,96 +511,51 @@ def create_workcenter_roi_chart(workcenter_df, sort_by="overrun_percent"):
     elif sort_by == "total_hours" and 'actual_hours' in df.columns:
         df = df.sort_values('actual_hours', ascending=False)
     
-    # Create figure
-    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    # Like the hours chart, draw at most MAX_WORKCENTER_BARS bars (the top of the chosen ordering)
+    df = df.head(MAX_WORKCENTER_BARS)
+    
+    traces = []
     
     # Add bars for overrun percentage
     if 'overrun_percent' in df.columns:
         # Color bars based on overrun percentage
-        bar_colors = df['overrun_percent'].apply(
-            lambda x: '#22c55e' if x <= 0 else ('#f97316' if x < 15 else '#dc2626')
-        ).tolist()
+        overrun_pct = df['overrun_percent'].to_numpy(dtype=float)
+        bar_colors = OVERRUN_BAR_PALETTE[(overrun_pct > 0).astype(int) + (overrun_pct >= 15)].tolist()
         
-        fig.add_trace(
-            go.Bar(
+        traces.append(
+            _bar(
                 x=df['work_center'],
                 y=df['overrun_percent'],
                 name="Overrun %",
-                marker_color=bar_colors,
-                text=df['overrun_percent'].apply(lambda x: f"{x:.1f}%"),
+                marker=dict(color=bar_colors),
+                text=np.char.mod('%.1f%%', overrun_pct).tolist(),
                 textposition="auto"
-            ),
-            secondary_y=False
+            )
         )
     
     # Add line for utilization
     if 'utilization' in df.columns:
-        fig.add_trace(
-            go.Scatter(
+        traces.append(
+            _scatter(
+                secondary_y=True,
                 x=df['work_center'],
                 y=df['utilization'],
                 name="Utilization %",
                 mode="markers+lines",
                 marker=dict(size=8, color="#3b82f6"),
                 line=dict(width=2, color="#3b82f6")
-            ),
-            secondary_y=True
+            )
         )
     
-    # Update layout
-    fig.update_layout(
-        title="Work Center ROI Analysis",
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5),
-        height=400,
-        plot_bgcolor="white",
-        margin=dict(l=20, r=20, t=50, b=100)
-    )
-    
-    # Update axes
-    fig.update_xaxes(
-        title="Work Center",
-        tickangle=-45,
-        tickfont=dict(size=11)
-    )
-    
-    fig.update_yaxes(
-        title="Overrun %",
-        ticksuffix="%",
-        secondary_y=False,
-        range=[-10, max(100, df['overrun_percent'].max() * 1.1) if 'overrun_percent' in df.columns else 100],
-        zeroline=True,
-        zerolinecolor='gray',
-        zerolinewidth=1,
-        gridcolor="rgba(107, 114, 128, 0.1)"
-    )
-    
-    fig.update_yaxes(
-        title="Utilization %",
-        ticksuffix="%",
-        range=[0, 100],
-        secondary_y=True
-    )
-    
-    # Add a horizontal line at 0% for overrun
-    fig.add_shape(
-        type="line",
-        x0=-0.5,
-        y0=0,
-        x1=len(df)-0.5,
-        y1=0,
-        line=dict(color="black", width=1, dash="dot"),
-        xref="x",
-        yref="y"
-    )
-    
     # Add annotations for potential ROI insights
+    annotations = []
     if 'overrun_percent' in df.columns and 'utilization' in df.columns and len(df) > 0:
         # Find work center with highest overrun AND high utilization
         high_impact_wcs = df[df['utilization'] > df['utilization'].median()]
         if len(high_impact_wcs) > 0:
             highest_overrun_wc = high_impact_wcs.sort_values('overrun_percent', ascending=False).iloc[0]
             
-            fig.add_annotation(
+            annotations.append(dict(
                 x=highest_overrun_wc['work_center'],
                 y=highest_overrun_wc['overrun_percent'],
                 text="Highest ROI Potential",
@@ -526,6 +570,46 @@ def create_workcenter_roi_chart(workcenter_df, sort_by="overrun_percent"):
                 borderwidth=1,
                 borderpad=4,
                 font=dict(size=10, color="#92400e")
-            )
+            ))
+    
+    # Create figure, with a horizontal line at 0% for overrun
+    fig = _secondary_y_figure(
+        traces,
+        title=dict(text="Work Center ROI Analysis"),
+        legend=dict(xanchor="center", x=0.5),
+        height=400,
+        plot_bgcolor="white",
+        margin=dict(l=20, r=20, t=50, b=100),
+        xaxis=dict(
+            title=dict(text="Work Center"),
+            tickangle=-45,
+            tickfont=dict(size=11)
+        ),
+        yaxis=dict(
+            title=dict(text="Overrun %"),
+            ticksuffix="%",
+            range=[-10, max(100, df['overrun_percent'].max() * 1.1) if 'overrun_percent' in df.columns else 100],
+            zeroline=True,
+            zerolinecolor='gray',
+            zerolinewidth=1,
+            gridcolor="rgba(107, 114, 128, 0.1)"
+        ),
+        yaxis2=dict(
+            title=dict(text="Utilization %"),
+            ticksuffix="%",
+            range=[0, 100]
+        ),
+        shapes=[dict(
+            type="line",
+            x0=-0.5,
+            y0=0,
+            x1=len(df)-0.5,
+            y1=0,
+            line=dict(color="black", width=1, dash="dot"),
+            xref="x",
+            yref="y"
+        )],
+        annotations=annotations
+    )
     
     return fig